@@ -0,0 +1,63 @@
+"""add_indexes_for_hot_queries
+
+Revision ID: 5e3a9d7c2b18
+Revises: 8f2d6c4a1e97
+Create Date: 2026-10-17 18:22:41.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e3a9d7c2b18"
+down_revision = "8f2d6c4a1e97"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ("ix_item_owner_id_id", "item", ["owner_id", "id"], None),
+    ("ix_appointment_user_id_id", "appointment", ["user_id", "id"], None),
+    ("ix_doctor_hospital_id_id", "doctor", ["hospital_id", "id"], None),
+    (
+        "ix_doctortimeslot_doctor_id_time_slot_is_available",
+        "doctortimeslot",
+        ["doctor_id", "time_slot", "is_available"],
+        None,
+    ),
+    (
+        "ix_doctortimeslot_available",
+        "doctortimeslot",
+        ["doctor_id", "time_slot"],
+        "is_available",
+    ),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY doesn't block writes to the tables, but can't
+    # run inside a transaction. A failed build leaves an invalid index behind,
+    # drop it before running this again
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,21 +1,30 @@
-from collections.abc import Generator
+import uuid
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy import orm
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core import security
+from app import crud
+from app.core import pagination, security
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.core.db import async_engine, engine
+from app.models import TokenPayload, TokenUser, User
 
+# Either one authenticates a request, see get_token_user
 reusable_oauth2 = OAuth2PasswordBearer(
-    tokenUrl=f"{settings.API_V1_STR}/login/access-token"
+    tokenUrl=f"{settings.API_V1_STR}/login/access-token", auto_error=False
 )
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+# Allowed with the "read" scope of an API key
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -23,11 +32,32 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
-TokenDep = Annotated[str, Depends(reusable_oauth2)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+TokenDep = Annotated[str | None, Depends(reusable_oauth2)]
+ApiKeyDep = Annotated[str | None, Depends(api_key_header)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def get_token_user(
+    request: Request, session: SessionDep, token: TokenDep, api_key: ApiKeyDep
+) -> TokenUser:
+    """
+    The user as the access token or API key has it, without loading it from
+    the database for an access token.
+    """
+    if api_key:
+        return get_api_key_user(request, session, api_key)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -38,7 +68,80 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    if crud.revocations.needs_reload():
+        crud.reload_revocations(session=session)
+    user_id = str(token_data.sub)
+    if not token_data.is_active or crud.revocations.is_inactive(user_id):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    if crud.revocations.is_revoked(user_id, token_data.iat):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return TokenUser(
+        id=token_data.sub,
+        is_active=token_data.is_active,
+        is_superuser=token_data.is_superuser,
+    )
+
+
+def get_api_key_user(request: Request, session: Session, api_key: str) -> TokenUser:
+    token_user = crud.get_api_key_user(session=session, key=api_key)
+    if not token_user:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    if crud.revocations.needs_reload():
+        crud.reload_revocations(session=session)
+    if not token_user.is_active or crud.revocations.is_inactive(str(token_user.id)):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    scopes = token_user.scopes or []
+    if request.method in READ_METHODS:
+        if "read" not in scopes:
+            raise HTTPException(
+                status_code=403, detail="The API key doesn't have the read scope"
+            )
+    elif "write" not in scopes:
+        raise HTTPException(
+            status_code=403, detail="The API key doesn't have the write scope"
+        )
+    return token_user
+
+
+CurrentTokenUser = Annotated[TokenUser, Depends(get_token_user)]
+
+
+async def get_async_token_user(
+    request: Request, session: AsyncSessionDep, token: TokenDep, api_key: ApiKeyDep
+) -> TokenUser:
+    """
+    get_token_user for the async routes, its queries go through the async
+    session instead of holding a threadpool thread.
+    """
+
+    def authenticate(sync_session: orm.Session) -> TokenUser:
+        # The AsyncSession's sync_session_class, SQLModel's Session
+        assert isinstance(sync_session, Session)
+        return get_token_user(request, sync_session, token, api_key)
+
+    return await session.run_sync(authenticate)
+
+
+AsyncCurrentTokenUser = Annotated[TokenUser, Depends(get_async_token_user)]
+
+
+def check_not_api_key(current_user: CurrentTokenUser) -> None:
+    # A leaked key must not be able to mint or keep itself, or take over the
+    # account, e.g. by changing its email and recovering the password
+    if current_user.scopes is not None:
+        raise HTTPException(
+            status_code=403, detail="This can't be done with an API key"
+        )
+
+
+def get_current_user(session: SessionDep, token_user: CurrentTokenUser) -> User:
+    user = crud.get_cached_user(session=session, user_id=token_user.id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -49,9 +152,24 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
-    if not current_user.is_superuser:
+def get_current_active_superuser(token_user: CurrentTokenUser) -> TokenUser:
+    if not token_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
         )
-    return current_user
+    return token_user
+
+
+def get_cursor(cursor: str | None = None) -> uuid.UUID | None:
+    """
+    The next_cursor of the previous page, when paging with cursors.
+    """
+    if cursor is None:
+        return None
+    try:
+        return pagination.decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+CursorDep = Annotated[uuid.UUID | None, Depends(get_cursor)]
@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 
-from app.api.routes import gateway, login, private, users, utils
+from app.api.routes import api_keys, gateway, login, private, users, utils
 from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(login.router)
 api_router.include_router(users.router)
 api_router.include_router(utils.router)
+api_router.include_router(api_keys.router)
 
 # API Gateway - proxy requests to microservices
 api_router.include_router(gateway.router)
@@ -0,0 +1,76 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from sqlmodel import col, func, select
+
+from app import crud
+from app.api.deps import CurrentTokenUser, SessionDep, check_not_api_key
+from app.models import (
+    ApiKey,
+    ApiKeyCreate,
+    ApiKeyCreated,
+    ApiKeysPublic,
+    Message,
+)
+
+router = APIRouter(prefix="/api-keys", tags=["api-keys"])
+
+
+@router.get("/", response_model=ApiKeysPublic)
+def read_api_keys(
+    session: SessionDep, current_user: CurrentTokenUser, skip: int = 0, limit: int = 100
+) -> Any:
+    """
+    Retrieve own API keys.
+    """
+    count_statement = (
+        select(func.count())
+        .select_from(ApiKey)
+        .where(ApiKey.user_id == current_user.id)
+    )
+    count = session.exec(count_statement).one()
+    statement = (
+        select(ApiKey)
+        .where(ApiKey.user_id == current_user.id)
+        .order_by(col(ApiKey.id))
+        .offset(skip)
+        .limit(limit)
+    )
+    api_keys = session.exec(statement).all()
+    return ApiKeysPublic(data=api_keys, count=count)
+
+
+@router.post("/", response_model=ApiKeyCreated)
+def create_api_key(
+    *, session: SessionDep, current_user: CurrentTokenUser, key_in: ApiKeyCreate
+) -> Any:
+    """
+    Create an API key, the key is only returned this once.
+    """
+    check_not_api_key(current_user)
+    if "admin" in key_in.scopes and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    db_key, key = crud.create_api_key(
+        session=session, key_in=key_in, user_id=current_user.id
+    )
+    return ApiKeyCreated.model_validate(db_key, update={"key": key})
+
+
+@router.delete("/{id}")
+def revoke_api_key(
+    session: SessionDep, current_user: CurrentTokenUser, id: uuid.UUID
+) -> Message:
+    """
+    Revoke an API key.
+    """
+    check_not_api_key(current_user)
+    db_key = session.get(ApiKey, id)
+    if not db_key:
+        raise HTTPException(status_code=404, detail="API key not found")
+    if not current_user.is_superuser and (db_key.user_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    crud.revoke_api_key(session=session, db_key=db_key)
+    return Message(message="API key revoked successfully")
@@ -2,9 +2,10 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from sqlmodel import select
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import AsyncCurrentTokenUser, AsyncSessionDep, CursorDep
+from app.core.pagination import CountStrategy, fetch_page_async
 from app.models import (
     Appointment,
     AppointmentCreate,
@@ -27,7 +28,7 @@ router = APIRouter(prefix="/appointments", tags=["appointments"])
 
 
 @router.post("/validate-user")
-def validate_user(*, user_info: UserValidation) -> Message:
+async def validate_user(*, user_info: UserValidation) -> Message:
     """
     Validate user information before booking.
     This is a simple validation that checks if the required fields are provided.
@@ -48,54 +49,66 @@ def validate_user(*, user_info: UserValidation) -> Message:
 
 
 @router.get("/hospitals", response_model=HospitalsPublic)
-def get_hospitals(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def get_hospitals(
+    session: AsyncSessionDep,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
+) -> Any:
     """
-    Get list of all hospitals.
+    Get list of all hospitals, in pages after skip hospitals or a cursor.
     """
-    count_statement = select(func.count()).select_from(Hospital)
-    count = session.exec(count_statement).one()
-    statement = select(Hospital).offset(skip).limit(limit)
-    hospitals = session.exec(statement).all()
-
-    return HospitalsPublic(data=hospitals, count=count)
+    page = await fetch_page_async(
+        session,
+        select(Hospital),
+        Hospital.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+    )
+    return HospitalsPublic(**vars(page))
 
 
 @router.get("/hospitals/{hospital_id}/doctors", response_model=DoctorsPublic)
-def get_hospital_doctors(
-    session: SessionDep, hospital_id: uuid.UUID, skip: int = 0, limit: int = 100
+async def get_hospital_doctors(
+    session: AsyncSessionDep,
+    hospital_id: uuid.UUID,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
 ) -> Any:
     """
     Get list of doctors for a specific hospital.
     """
     # Verify hospital exists
-    hospital = session.get(Hospital, hospital_id)
+    hospital = await session.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    count_statement = (
-        select(func.count()).select_from(Doctor).where(Doctor.hospital_id == hospital_id)
+    page = await fetch_page_async(
+        session,
+        select(Doctor).where(Doctor.hospital_id == hospital_id),
+        Doctor.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
     )
-    count = session.exec(count_statement).one()
-    statement = (
-        select(Doctor)
-        .where(Doctor.hospital_id == hospital_id)
-        .offset(skip)
-        .limit(limit)
-    )
-    doctors = session.exec(statement).all()
-
-    return DoctorsPublic(data=doctors, count=count)
+    return DoctorsPublic(**vars(page))
 
 
 @router.get("/doctors/{doctor_id}/time-slots")
-def get_doctor_time_slots(
-    session: SessionDep, doctor_id: uuid.UUID
+async def get_doctor_time_slots(
+    session: AsyncSessionDep, doctor_id: uuid.UUID
 ) -> list[DoctorTimeSlotPublic]:
     """
     Get available time slots for a specific doctor.
     """
     # Verify doctor exists
-    doctor = session.get(Doctor, doctor_id)
+    doctor = await session.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
@@ -103,25 +116,28 @@ def get_doctor_time_slots(
         DoctorTimeSlot.doctor_id == doctor_id,
         DoctorTimeSlot.is_available == True,  # noqa: E712
     )
-    time_slots = session.exec(statement).all()
+    time_slots = (await session.exec(statement)).all()
 
     return [DoctorTimeSlotPublic.model_validate(slot) for slot in time_slots]
 
 
 @router.post("/", response_model=AppointmentPublic)
-def create_appointment(
-    *, session: SessionDep, current_user: CurrentUser, appointment_in: AppointmentCreate
+async def create_appointment(
+    *,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentTokenUser,
+    appointment_in: AppointmentCreate,
 ) -> Any:
     """
     Create a new appointment.
     """
     # Verify hospital exists
-    hospital = session.get(Hospital, appointment_in.hospital_id)
+    hospital = await session.get(Hospital, appointment_in.hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
 
     # Verify doctor exists and belongs to the hospital
-    doctor = session.get(Doctor, appointment_in.doctor_id)
+    doctor = await session.get(Doctor, appointment_in.doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     if doctor.hospital_id != appointment_in.hospital_id:
@@ -135,7 +151,7 @@ def create_appointment(
         DoctorTimeSlot.time_slot == appointment_in.appointment_time,
         DoctorTimeSlot.is_available == True,  # noqa: E712
     )
-    time_slot = session.exec(time_slot_statement).first()
+    time_slot = (await session.exec(time_slot_statement)).first()
     if not time_slot:
         raise HTTPException(
             status_code=400, detail="Selected time slot is not available"
@@ -151,50 +167,47 @@ def create_appointment(
     time_slot.is_available = False
     session.add(time_slot)
 
-    session.commit()
-    session.refresh(appointment)
+    await session.commit()
+    await session.refresh(appointment)
 
     return appointment
 
 
 @router.get("/", response_model=AppointmentsPublic)
-def get_appointments(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def get_appointments(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentTokenUser,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
 ) -> Any:
     """
     Get list of appointments for the current user.
     """
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Appointment)
-        count = session.exec(count_statement).one()
-        statement = select(Appointment).offset(skip).limit(limit)
-        appointments = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Appointment)
-            .where(Appointment.user_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Appointment)
-            .where(Appointment.user_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        appointments = session.exec(statement).all()
-
-    return AppointmentsPublic(data=appointments, count=count)
+    statement = select(Appointment)
+    if not current_user.is_superuser:
+        statement = statement.where(Appointment.user_id == current_user.id)
+    page = await fetch_page_async(
+        session,
+        statement,
+        Appointment.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+    )
+    return AppointmentsPublic(**vars(page))
 
 
 @router.get("/{appointment_id}", response_model=AppointmentPublic)
-def get_appointment(
-    session: SessionDep, current_user: CurrentUser, appointment_id: uuid.UUID
+async def get_appointment(
+    session: AsyncSessionDep, current_user: AsyncCurrentTokenUser, appointment_id: uuid.UUID
 ) -> Any:
     """
     Get appointment details by ID.
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     if not current_user.is_superuser and (appointment.user_id != current_user.id):
@@ -203,17 +216,17 @@ def get_appointment(
 
 
 @router.put("/{appointment_id}", response_model=AppointmentPublic)
-def update_appointment(
+async def update_appointment(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentTokenUser,
     appointment_id: uuid.UUID,
     appointment_in: AppointmentUpdate,
 ) -> Any:
     """
     Update an appointment (e.g., cancel it).
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     if not current_user.is_superuser and (appointment.user_id != current_user.id):
@@ -225,7 +238,7 @@ def update_appointment(
             DoctorTimeSlot.doctor_id == appointment.doctor_id,
             DoctorTimeSlot.time_slot == appointment.appointment_time,
         )
-        time_slot = session.exec(time_slot_statement).first()
+        time_slot = (await session.exec(time_slot_statement)).first()
         if time_slot:
             time_slot.is_available = True
             session.add(time_slot)
@@ -233,19 +246,19 @@ def update_appointment(
     update_dict = appointment_in.model_dump(exclude_unset=True)
     appointment.sqlmodel_update(update_dict)
     session.add(appointment)
-    session.commit()
-    session.refresh(appointment)
+    await session.commit()
+    await session.refresh(appointment)
     return appointment
 
 
 @router.delete("/{appointment_id}")
-def delete_appointment(
-    session: SessionDep, current_user: CurrentUser, appointment_id: uuid.UUID
+async def delete_appointment(
+    session: AsyncSessionDep, current_user: AsyncCurrentTokenUser, appointment_id: uuid.UUID
 ) -> Message:
     """
     Delete an appointment.
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     if not current_user.is_superuser and (appointment.user_id != current_user.id):
@@ -256,11 +269,11 @@ def delete_appointment(
         DoctorTimeSlot.doctor_id == appointment.doctor_id,
         DoctorTimeSlot.time_slot == appointment.appointment_time,
     )
-    time_slot = session.exec(time_slot_statement).first()
+    time_slot = (await session.exec(time_slot_statement)).first()
     if time_slot:
         time_slot.is_available = True
         session.add(time_slot)
 
-    session.delete(appointment)
-    session.commit()
+    await session.delete(appointment)
+    await session.commit()
     return Message(message="Appointment deleted successfully")
@@ -1,68 +1,549 @@
-import os
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, TypeVar
+from urllib.parse import urlencode
+
+import anyio
 import httpx
-from fastapi import APIRouter, HTTPException, Request, Response
-from typing import Any
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from jwt.exceptions import InvalidTokenError
+
+from app.api.deps import CurrentTokenUser, get_current_active_superuser
+from app.core import upstream
+from app.core.balancer import Replica
+from app.core.bulkhead import BulkheadFull
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import ALGORITHM
+from app.core.singleflight import SingleFlight
+from app.core.upstream import Upstream
+from app.models import AggregatePart, Dashboard
 
 router = APIRouter()
 
-# Microservices configuration
-# Use environment variables for Docker, fallback to localhost for local development
-APPOINTMENTS_SERVICE_URL = os.getenv(
-    "APPOINTMENTS_SERVICE_URL",
-    "http://localhost:8001/api/v1/appointments"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Seconds left of the request's time budget, set on calls to the services
+DEADLINE_HEADER = "X-Request-Timeout"
+DISCONNECT_POLL_INTERVAL = 0.1
+
+# Query parameters carrying the user a call to a service is made for
+AFFINITY_PARAMS = ("user_id", "owner_id")
+
+# Set by the services after a write, reads go to their primary database until
+# the time (epoch seconds) it holds, or on the header. See
+# services/shared/database.py
+PRIMARY_PIN_COOKIE = "read_primary_until"
+PRIMARY_HEADER = "X-Read-Primary"
+
+T = TypeVar("T")
+
+# Headers a caller authenticates with, an access token or an API key
+CREDENTIAL_HEADERS = ("authorization", "x-api-key")
+
+# Headers that only apply to a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+def forward_request_headers(request: Request, *, stream: bool) -> dict[str, str]:
+    # A streamed body is sent as is, so its length is still valid
+    excluded = HOP_BY_HOP_HEADERS | {"host"}
+    if not stream:
+        excluded.add("content-length")
+    headers = {
+        key: value
+        for key, value in request.headers.items()
+        if key.lower() not in excluded
+    }
+    if not stream:
+        # A buffered response is decoded here and compressed again on the way
+        # out by the gateway, so don't have the service compress it first
+        headers = {k: v for k, v in headers.items() if k.lower() != "accept-encoding"}
+        headers["accept-encoding"] = "identity"
+    return headers
+
+
+def forward_response_headers(
+    response: httpx.Response, *, stream: bool
+) -> dict[str, str]:
+    # A buffered body has already been decoded by httpx, so the upstream
+    # encoding and length no longer describe it
+    excluded = set(HOP_BY_HOP_HEADERS)
+    if not stream:
+        excluded |= {"content-encoding", "content-length"}
+    return {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in excluded
+    }
+
+
+@dataclass
+class BufferedResponse:
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+
+    def to_response(self, cache_status: str | None = None) -> Response:
+        headers = dict(self.headers)
+        if cache_status:
+            headers["X-Cache"] = cache_status
+        return Response(
+            content=self.content, status_code=self.status_code, headers=headers
+        )
+
+
+# Keyed by (service name, path, normalized query string)
+response_cache: TTLCache[tuple[str, str, str], BufferedResponse] = TTLCache(
+    maxsize=settings.GATEWAY_CACHE_MAX_ENTRIES, ttl=60.0
 )
-ITEMS_SERVICE_URL = os.getenv(
-    "ITEMS_SERVICE_URL",
-    "http://localhost:8002/api/v1/items"
+
+# Keyed by (service name, path, normalized query string, auth scope)
+in_flight_reads: SingleFlight[tuple[str, str, str, str], BufferedResponse] = (
+    SingleFlight()
 )
 
 
+def match_route(service: Upstream, path: str, patterns: Iterable[str]) -> str | None:
+    route = f"{service.name}:{path.rstrip('/')}"
+    for pattern in patterns:
+        if fnmatchcase(route, pattern):
+            return pattern
+    return None
+
+
+def get_cache_ttl(service: Upstream, path: str, method: str) -> float | None:
+    if method != "GET":
+        return None
+    pattern = match_route(service, path, settings.GATEWAY_CACHE_TTLS)
+    return None if pattern is None else settings.GATEWAY_CACHE_TTLS[pattern]
+
+
+def is_hedged(service: Upstream, path: str, method: str) -> bool:
+    if method != "GET":
+        return False
+    return match_route(service, path, settings.GATEWAY_HEDGE_ROUTES) is not None
+
+
+def get_coalesce_key(
+    service: Upstream, path: str, request: Request
+) -> tuple[str, str, str, str] | None:
+    if request.method != "GET":
+        return None
+    if match_route(service, path, settings.GATEWAY_COALESCE_ROUTES) is None:
+        return None
+    # Only callers with the same credentials may share a response
+    credentials = "\n".join(request.headers.get(h, "") for h in CREDENTIAL_HEADERS)
+    scope = hashlib.sha256(credentials.encode()).hexdigest()
+    return (*get_cache_key(service, path, request), scope)
+
+
+def get_cache_key(
+    service: Upstream, path: str, request: Request
+) -> tuple[str, str, str]:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return (service.name, path.rstrip("/"), query)
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """
+    Whether the client reads its own writes, which shared reads may predate.
+    """
+    if request.headers.get(PRIMARY_HEADER, "").lower() in ("1", "true"):
+        return True
+    try:
+        until = float(request.cookies.get(PRIMARY_PIN_COOKIE, "0"))
+    except ValueError:
+        return False
+    return time.time() < until
+
+
+def get_deadline(service: Upstream, path: str, request: Request) -> float:
+    pattern = match_route(service, path, settings.GATEWAY_ROUTE_TIMEOUTS)
+    budget = (
+        settings.GATEWAY_TIMEOUT
+        if pattern is None
+        else settings.GATEWAY_ROUTE_TIMEOUTS[pattern]
+    )
+    # Honour a shorter budget set by the caller
+    try:
+        budget = min(budget, float(request.headers.get(DEADLINE_HEADER, "inf")))
+    except ValueError:
+        pass
+    return time.monotonic() + budget
+
+
+def get_affinity_key(
+    service: Upstream, params: Mapping[str, Any], authorization: str | None = None
+) -> str | None:
+    """
+    The user a call is made for, to keep their calls on one replica.
+
+    Taken from the user id the services filter on, else from the access
+    token's subject. Only looked up when the service balances by hash.
+    """
+    if service.balancer.strategy != "consistent_hash":
+        return None
+    for name in AFFINITY_PARAMS:
+        if params.get(name):
+            return str(params[name])
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject else None
+
+
+def invalidate_service_cache(service: Upstream) -> None:
+    response_cache.invalidate(lambda key: key[0] == service.name)
+
+
+async def send_through_breaker(
+    service: Upstream,
+    replica: Replica,
+    upstream_request: httpx.Request,
+    *,
+    stream: bool,
+    deadline: float,
+) -> httpx.Response:
+    """
+    Send a request to a microservice replica through the circuit breaker.
+
+    The time left until the deadline bounds the call and is passed on to the
+    service, so it can stop working on a request nobody waits for anymore.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+    upstream_request.headers[DEADLINE_HEADER] = f"{remaining:.3f}"
+    upstream_request.extensions["timeout"] = httpx.Timeout(
+        remaining, pool=min(remaining, settings.GATEWAY_POOL_TIMEOUT)
+    ).as_dict()
+
+    breaker = service.breaker
+    if not breaker.allow_request():
+        raise HTTPException(
+            status_code=503,
+            detail=f"The {service.name} service is temporarily unavailable.",
+            headers={"Retry-After": str(max(1, round(breaker.retry_after())))},
+        )
+    started = time.monotonic()
+
+    def record(success: bool) -> None:
+        breaker.record(success=success, duration=time.monotonic() - started)
+        service.balancer.record(replica, success=success)
+
+    try:
+        response = await service.client.send(upstream_request, stream=stream)
+    except httpx.ConnectError:
+        record(False)
+        raise HTTPException(
+            status_code=503,
+            detail="Service unavailable. Please ensure the microservice is running.",
+        )
+    except httpx.TimeoutException:
+        record(False)
+        raise HTTPException(status_code=504, detail="Service timed out.")
+    except Exception as e:
+        record(False)
+        raise HTTPException(status_code=500, detail=str(e))
+    except BaseException:
+        # Cancelled, e.g. the client went away, says nothing about the service
+        breaker.release()
+        raise
+    record(response.status_code < 500)
+    return response
+
+
+async def send_upstream(
+    service: Upstream,
+    replica: Replica,
+    upstream_request: httpx.Request,
+    *,
+    stream: bool,
+    deadline: float,
+) -> httpx.Response:
+    """
+    Send a request to a microservice replica within the service's bulkhead.
+
+    A streamed response keeps its bulkhead slot, and counts as outstanding
+    on its replica, until it is closed with close_upstream_response.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+    bulkhead = service.bulkhead
+    try:
+        await bulkhead.acquire(timeout=remaining)
+    except BulkheadFull:
+        raise HTTPException(
+            status_code=503,
+            detail=f"The {service.name} service is overloaded.",
+            headers={"Retry-After": str(settings.GATEWAY_BULKHEAD_RETRY_AFTER)},
+        )
+    replica.outstanding += 1
+    replica.requests += 1
+    try:
+        response = await send_through_breaker(
+            service, replica, upstream_request, stream=stream, deadline=deadline
+        )
+    except BaseException:
+        release_upstream(service, replica)
+        raise
+    if not stream:
+        release_upstream(service, replica)
+    return response
+
+
+def release_upstream(service: Upstream, replica: Replica) -> None:
+    replica.outstanding -= 1
+    service.bulkhead.release()
+
+
+async def close_upstream_response(
+    service: Upstream, replica: Replica, response: httpx.Response
+) -> None:
+    try:
+        await response.aclose()
+    finally:
+        release_upstream(service, replica)
+
+
+async def stream_upstream_body(
+    service: Upstream, replica: Replica, response: httpx.Response
+) -> AsyncIterator[bytes]:
+    """
+    Stream an upstream response's body, closing the response however it ends.
+
+    Starlette skips a response's background task when the body fails midway
+    or the client disconnects, so closing can't be left to one.
+    """
+    try:
+        async for chunk in response.aiter_raw(settings.GATEWAY_STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        # Shielded, or a cancelled stream would keep its connection, bulkhead
+        # slot and outstanding count
+        with anyio.CancelScope(shield=True):
+            await close_upstream_response(service, replica, response)
+
+
+async def fetch_buffered(
+    service: Upstream,
+    replica: Replica,
+    upstream_request: httpx.Request,
+    *,
+    deadline: float,
+) -> BufferedResponse:
+    response = await send_upstream(
+        service, replica, upstream_request, stream=False, deadline=deadline
+    )
+    return BufferedResponse(
+        status_code=response.status_code,
+        headers=forward_response_headers(response, stream=False),
+        content=response.content,
+    )
+
+
+async def fetch_hedged(
+    service: Upstream,
+    replica: Replica,
+    build: Callable[[Replica], httpx.Request],
+    *,
+    deadline: float,
+) -> BufferedResponse:
+    """
+    Fetch an idempotent read, hedging it if the first attempt is slow.
+
+    Past the service's hedge delay a second attempt is sent, to another
+    replica when there is one, and whichever answers first is used. An
+    attempt that fails outright leaves the other one to answer.
+    """
+    hedging = service.hedging
+    hedging.start_call()
+    delay = hedging.delay()
+
+    async def attempt(replica: Replica) -> tuple[BufferedResponse, float]:
+        started = time.monotonic()
+        buffered = await fetch_buffered(
+            service, replica, build(replica), deadline=deadline
+        )
+        return buffered, time.monotonic() - started
+
+    first = asyncio.ensure_future(attempt(replica))
+    pending: set[asyncio.Future[tuple[BufferedResponse, float]]] = {first}
+    hedged = False
+    try:
+        while True:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=None if hedged else delay,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # The first attempt is slower than the hedge delay
+                hedged = True
+                if hedging.allow_hedge():
+                    other = service.balancer.pick(exclude=replica)
+                    pending.add(asyncio.ensure_future(attempt(other)))
+                continue
+            answered = [task for task in done if task.exception() is None]
+            if not answered and pending:
+                continue
+            task = answered[0] if answered else done.pop()
+            buffered, duration = task.result()
+            hedging.observe(duration)
+            if task is not first:
+                hedging.wins += 1
+            return buffered
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await an upstream call, cancelling it if the client disconnects first.
+
+    Only for requests whose body has been read already, checking for a
+    disconnect would otherwise consume body chunks.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
+
+
 async def proxy_request(
-    service_url: str,
+    service: Upstream,
     path: str,
     request: Request,
+    stream: bool | None = None,
 ) -> Response:
     """
     Proxy HTTP request to microservice
+
+    In streaming mode the request and response bodies are piped chunk by
+    chunk instead of being read fully into memory first.
     """
-    # Build target URL
-    target_url = f"{service_url}{path}"
+    if stream is None:
+        stream = settings.GATEWAY_STREAMING
+
+    # A client pinned to the primary after a write skips the cache and the
+    # coalesced reads, they may not have its writes yet
+    pinned = pinned_to_primary(request)
+    # Serve catalog reads from the response cache when possible
+    cache_ttl = None if pinned else get_cache_ttl(service, path, request.method)
+    cache_key = get_cache_key(service, path, request)
+    if cache_ttl is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached.to_response("HIT")
+    # Identical concurrent reads share one upstream call
+    coalesce_key = None if pinned else get_coalesce_key(service, path, request)
+    # Slow reads get a second attempt
+    hedged = is_hedged(service, path, request.method)
+    buffered_read = cache_ttl is not None or coalesce_key is not None or hedged
+    if buffered_read:
+        stream = False
+
+    deadline = get_deadline(service, path, request)
+
+    # Build target URL on the replica picked for this request
+    replica = service.balancer.pick(
+        get_affinity_key(
+            service, request.query_params, request.headers.get("authorization")
+        )
+    )
 
     # Get request body if exists
-    body = None
+    body: Any = None
     if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
+        body = request.stream() if stream else await request.body()
 
-    # Forward request to microservice
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=target_url,
-                params=request.query_params,
-                headers={
-                    key: value
-                    for key, value in request.headers.items()
-                    if key.lower() not in ["host", "content-length"]
-                },
-                content=body,
-                timeout=30.0,
-            )
+    # Forward request to microservice over its pooled client
+    headers = forward_request_headers(request, stream=stream)
 
-            # Return response from microservice
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.headers.get("content-type"),
-            )
-        except httpx.ConnectError:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Service unavailable. Please ensure the microservice is running.",
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    def build(replica: Replica) -> httpx.Request:
+        return service.client.build_request(
+            method=request.method,
+            url=f"{replica.base_url}{path}",
+            params=request.query_params,
+            headers=headers,
+            content=body,
+        )
+
+    if buffered_read:
+
+        def fetch_read() -> Awaitable[BufferedResponse]:
+            if hedged:
+                return fetch_hedged(service, replica, build, deadline=deadline)
+            return fetch_buffered(service, replica, build(replica), deadline=deadline)
+
+        fetch = (
+            in_flight_reads.do(coalesce_key, fetch_read)
+            if coalesce_key is not None
+            else fetch_read()
+        )
+        buffered = await cancel_on_disconnect(request, fetch)
+        if cache_ttl is None:
+            return buffered.to_response()
+        if buffered.status_code == 200:
+            response_cache.set(cache_key, buffered, ttl=cache_ttl)
+        return buffered.to_response("MISS")
+
+    send = send_upstream(
+        service, replica, build(replica), stream=stream, deadline=deadline
+    )
+    if stream and body is not None:
+        response = await send
+    else:
+        response = await cancel_on_disconnect(request, send)
+
+    # A write may change what the service returns for any cached read
+    if request.method not in SAFE_METHODS:
+        invalidate_service_cache(service)
+
+    # Return response from microservice
+    response_headers = forward_response_headers(response, stream=stream)
+    if stream:
+        return StreamingResponse(
+            stream_upstream_body(service, replica, response),
+            status_code=response.status_code,
+            headers=response_headers,
+        )
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        headers=response_headers,
+        media_type=response.headers.get("content-type"),
+    )
 
 
 # Appointments Service Gateway Routes
@@ -75,7 +556,7 @@ async def appointments_gateway(path: str, request: Request) -> Any:
     """
     Gateway to Appointments Service
     """
-    return await proxy_request(APPOINTMENTS_SERVICE_URL, f"/{path}", request)
+    return await proxy_request(upstream.appointments, f"/{path}", request)
 
 
 @router.api_route(
@@ -87,7 +568,7 @@ async def appointments_root(request: Request) -> Any:
     """
     Gateway to Appointments Service root
     """
-    return await proxy_request(APPOINTMENTS_SERVICE_URL, "", request)
+    return await proxy_request(upstream.appointments, "", request)
 
 
 # Items Service Gateway Routes
@@ -100,7 +581,7 @@ async def items_gateway(path: str, request: Request) -> Any:
     """
     Gateway to Items Service
     """
-    return await proxy_request(ITEMS_SERVICE_URL, f"/{path}", request)
+    return await proxy_request(upstream.items, f"/{path}", request)
 
 
 @router.api_route(
@@ -112,4 +593,112 @@ async def items_root(request: Request) -> Any:
     """
     Gateway to Items Service root
     """
-    return await proxy_request(ITEMS_SERVICE_URL, "", request)
+    return await proxy_request(upstream.items, "", request)
+
+
+async def fetch_part(
+    service: Upstream,
+    path: str,
+    params: dict[str, Any] | None = None,
+    *,
+    pinned: bool = False,
+) -> AggregatePart:
+    """
+    Fetch one JSON part of an aggregated response within its time budget.
+
+    Failures are reported in the part instead of failing the whole response.
+    A part for a client pinned to the primary, see pinned_to_primary, is
+    read from the primary and not from the cache.
+    """
+    # Catalog parts share the response cache with proxied reads
+    cache_ttl = None if pinned else get_cache_ttl(service, path, "GET")
+    query = urlencode(sorted((params or {}).items()))
+    cache_key = (service.name, path.rstrip("/"), query)
+    buffered = response_cache.get(cache_key) if cache_ttl is not None else None
+    if buffered is None:
+        replica = service.balancer.pick(get_affinity_key(service, params or {}))
+
+        headers = {"accept-encoding": "identity"}
+        if pinned:
+            headers[PRIMARY_HEADER] = "1"
+
+        def build(replica: Replica) -> httpx.Request:
+            return service.client.build_request(
+                "GET", f"{replica.base_url}{path}", params=params, headers=headers
+            )
+
+        timeout = settings.GATEWAY_AGGREGATE_PART_TIMEOUT
+        deadline = time.monotonic() + timeout
+        fetch = (
+            fetch_hedged(service, replica, build, deadline=deadline)
+            if is_hedged(service, path, "GET")
+            else fetch_buffered(service, replica, build(replica), deadline=deadline)
+        )
+        try:
+            buffered = await asyncio.wait_for(fetch, timeout=timeout)
+        except asyncio.TimeoutError:
+            return AggregatePart(status="timeout", error=f"{service.name} timed out")
+        except HTTPException as e:
+            status = "timeout" if e.status_code == 504 else "error"
+            return AggregatePart(status=status, error=str(e.detail))
+        if cache_ttl is not None and buffered.status_code == 200:
+            response_cache.set(cache_key, buffered, ttl=cache_ttl)
+    if buffered.status_code != 200:
+        return AggregatePart(
+            status="error",
+            error=f"{service.name} responded with {buffered.status_code}",
+        )
+    return AggregatePart(status="ok", data=json.loads(buffered.content))
+
+
+@router.get("/dashboard", tags=["gateway"], response_model=Dashboard)
+async def dashboard(request: Request, current_user: CurrentTokenUser) -> Any:
+    """
+    The current user's items and appointments plus the hospital catalog,
+    fetched from the services concurrently.
+    """
+    pinned = pinned_to_primary(request)
+    items, appointments, hospitals = await asyncio.gather(
+        fetch_part(
+            upstream.items, "/", {"owner_id": str(current_user.id)}, pinned=pinned
+        ),
+        fetch_part(
+            upstream.appointments,
+            "/",
+            {"user_id": str(current_user.id)},
+            pinned=pinned,
+        ),
+        fetch_part(upstream.appointments, "/hospitals", pinned=pinned),
+    )
+    return Dashboard(items=items, appointments=appointments, hospitals=hospitals)
+
+
+@router.get(
+    "/gateway/metrics",
+    dependencies=[Depends(get_current_active_superuser)],
+    tags=["gateway"],
+)
+def gateway_metrics() -> dict[str, Any]:
+    """
+    Gateway runtime counters.
+    """
+    return {
+        "cache": response_cache.stats(),
+        "coalescing": in_flight_reads.stats(),
+        "breakers": {
+            name: service.breaker.snapshot()
+            for name, service in upstream.upstreams.items()
+        },
+        "bulkheads": {
+            name: service.bulkhead.snapshot()
+            for name, service in upstream.upstreams.items()
+        },
+        "balancers": {
+            name: service.balancer.snapshot()
+            for name, service in upstream.upstreams.items()
+        },
+        "hedging": {
+            name: service.hedging.snapshot()
+            for name, service in upstream.upstreams.items()
+        },
+    }
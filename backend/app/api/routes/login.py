@@ -1,16 +1,29 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from jwt.exceptions import InvalidTokenError
+from pydantic import ValidationError
+from sqlmodel import Session
 
 from app import crud
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
-from app.models import Message, NewPassword, Token, UserPublic
+from app.core.security import get_password_hash, login_throttle
+from app.models import (
+    Message,
+    NewPassword,
+    RefreshToken,
+    RefreshTokenPayload,
+    RefreshTokenRequest,
+    Token,
+    User,
+    UserPublic,
+)
 from app.utils import (
     generate_password_reset_token,
     generate_reset_password_email,
@@ -23,23 +36,79 @@ router = APIRouter(tags=["login"])
 
 @router.post("/login/access-token")
 def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+    request: Request,
+    session: SessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    client_ip = request.client.host if request.client else "unknown"
+    throttle_keys = [f"email:{form_data.username}", f"ip:{client_ip}"]
+    if settings.LOGIN_THROTTLE_ENABLED:
+        retry_after = login_throttle.retry_after(throttle_keys)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many failed login attempts, try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
     user = crud.authenticate(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
+        if settings.LOGIN_THROTTLE_ENABLED:
+            login_throttle.record_failure(throttle_keys)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if settings.LOGIN_THROTTLE_ENABLED:
+        login_throttle.reset(throttle_keys[0])
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return issue_tokens(session=session, user=user)
+
+
+@router.post("/login/refresh-token")
+def refresh_access_token(session: SessionDep, body: RefreshTokenRequest) -> Token:
+    """
+    Get a new access token with a refresh token, the refresh token is replaced
+    """
+    try:
+        payload = jwt.decode(
+            body.refresh_token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        token_data = RefreshTokenPayload(**payload)
+    except (InvalidTokenError, ValidationError):
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    user_id = token_data.sub
+    if not crud.use_refresh_token(
+        session=session, token_id=token_data.jti, user_id=user_id
+    ):
+        if session.get(RefreshToken, token_data.jti):
+            # Used before, so it was copied: end all of the user's sessions
+            crud.revoke_refresh_tokens(session=session, user_id=user_id)
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    user = session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return issue_tokens(session=session, user=user)
+
+
+def issue_tokens(*, session: Session, user: User) -> Token:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    db_token = crud.create_refresh_token(session=session, user_id=user.id)
     return Token(
         access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        )
+            user.id,
+            expires_delta=access_token_expires,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+        ),
+        refresh_token=security.create_refresh_token(
+            user.id, token_id=db_token.id, expires_at=db_token.expires_at
+        ),
+        expires_in=int(access_token_expires.total_seconds()),
     )
 
 
@@ -93,8 +162,14 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         raise HTTPException(status_code=400, detail="Inactive user")
     hashed_password = get_password_hash(password=body.new_password)
     user.hashed_password = hashed_password
+    user.tokens_revoked_at = datetime.now(timezone.utc)
+    user_id = user.id
     session.add(user)
     session.commit()
+    crud.invalidate_cached_user(user_id)
+    # Whoever may have had the old password is logged out
+    crud.revoke_refresh_tokens(session=session, user_id=user_id)
+    crud.revocations.revoke(user_id)
     return Message(message="Password updated successfully")
 
 
@@ -2,15 +2,18 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
+    CursorDep,
     SessionDep,
+    check_not_api_key,
     get_current_active_superuser,
 )
 from app.core.config import settings
+from app.core.pagination import CountStrategy, fetch_page
 from app.core.security import get_password_hash, verify_password
 from app.models import (
     Item,
@@ -34,18 +37,26 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
+) -> Any:
     """
-    Retrieve users.
+    Retrieve users, in pages either after skip users or after a cursor.
     """
-
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
-
-    return UsersPublic(data=users, count=count)
+    page = fetch_page(
+        session,
+        select(User),
+        User.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+    )
+    return UsersPublic(**vars(page))
 
 
 @router.post(
@@ -75,7 +86,9 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     return user
 
 
-@router.patch("/me", response_model=UserPublic)
+@router.patch(
+    "/me", dependencies=[Depends(check_not_api_key)], response_model=UserPublic
+)
 def update_user_me(
     *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
 ) -> Any:
@@ -94,10 +107,15 @@ def update_user_me(
     session.add(current_user)
     session.commit()
     session.refresh(current_user)
+    crud.invalidate_cached_user(current_user.id)
     return current_user
 
 
-@router.patch("/me/password", response_model=Message)
+@router.patch(
+    "/me/password",
+    dependencies=[Depends(check_not_api_key)],
+    response_model=Message,
+)
 def update_password_me(
     *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
@@ -112,8 +130,12 @@ def update_password_me(
         )
     hashed_password = get_password_hash(body.new_password)
     current_user.hashed_password = hashed_password
+    user_id = current_user.id
     session.add(current_user)
     session.commit()
+    crud.invalidate_cached_user(user_id)
+    # Whoever may have had the old password is logged out
+    crud.revoke_refresh_tokens(session=session, user_id=user_id)
     return Message(message="Password updated successfully")
 
 
@@ -125,7 +147,7 @@ def read_user_me(current_user: CurrentUser) -> Any:
     return current_user
 
 
-@router.delete("/me", response_model=Message)
+@router.delete("/me", dependencies=[Depends(check_not_api_key)], response_model=Message)
 def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
     """
     Delete own user.
@@ -134,8 +156,12 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
+    user_id = current_user.id
     session.delete(current_user)
+    crud.record_deleted_user(session=session, user_id=user_id)
     session.commit()
+    crud.invalidate_cached_user(user_id)
+    crud.revocations.revoke(user_id)
     return Message(message="User deleted successfully")
 
 
@@ -222,5 +248,8 @@ def delete_user(
     statement = delete(Item).where(col(Item.owner_id) == user_id)
     session.exec(statement)  # type: ignore
     session.delete(user)
+    crud.record_deleted_user(session=session, user_id=user_id)
     session.commit()
+    crud.invalidate_cached_user(user_id)
+    crud.revocations.revoke(user_id)
     return Message(message="User deleted successfully")
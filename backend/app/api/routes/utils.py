@@ -1,7 +1,13 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
+from app import crud
 from app.api.deps import get_current_active_superuser
+from app.core.db import async_engine, engine
+from app.core.pool import TimedQueuePool
+from app.core.security import hash_pool, login_throttle
 from app.models import Message
 from app.utils import generate_test_email, send_email
 
@@ -29,3 +35,27 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/metrics/", dependencies=[Depends(get_current_active_superuser)])
+def metrics() -> dict[str, Any]:
+    """
+    Runtime counters of this worker process.
+    """
+    return {
+        "user_cache": crud.user_cache.stats(),
+        "api_key_cache": crud.api_key_cache.stats(),
+        "revocations": crud.revocations.stats(),
+        "hash_pool": hash_pool.stats(),
+        "login_throttle": login_throttle.stats(),
+        "db_pool": (
+            engine.pool.snapshot()
+            if isinstance(engine.pool, TimedQueuePool)
+            else engine.pool.status()
+        ),
+        "db_async_pool": (
+            async_engine.pool.snapshot()
+            if isinstance(async_engine.pool, TimedQueuePool)
+            else async_engine.pool.status()
+        ),
+    }
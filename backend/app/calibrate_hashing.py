@@ -0,0 +1,163 @@
+"""
+Measure password hashing costs on this host.
+
+    python -m app.calibrate_hashing --budget-ms 250
+
+Times each candidate bcrypt rounds and argon2 parameters, and recommends the
+most expensive one per scheme whose p99 stays within the login budget. argon2
+is skipped unless the "argon2" extra is installed.
+"""
+
+import argparse
+import importlib.util
+import logging
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from passlib.hash import argon2, bcrypt
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = (10, 11, 12, 13, 14)
+# (time cost, memory cost in KiB, parallelism)
+ARGON2_PARAMETERS = (
+    (2, 19 * 1024, 1),
+    (3, 12 * 1024, 1),
+    (2, 64 * 1024, 4),
+    (3, 64 * 1024, 4),
+    (4, 64 * 1024, 4),
+    (3, 128 * 1024, 4),
+)
+
+
+@dataclass
+class Candidate:
+    scheme: str
+    settings: dict[str, int]
+    # Relative strength within the scheme, to pick the most expensive one
+    work: int
+    hasher: Any
+
+    def describe(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in self.settings.items())
+
+
+@dataclass
+class Timing:
+    candidate: Candidate
+    p50: float
+    p99: float
+
+
+def candidates() -> list[Candidate]:
+    found = [
+        Candidate(
+            scheme="bcrypt",
+            settings={"PASSWORD_BCRYPT_ROUNDS": rounds},
+            work=2**rounds,
+            hasher=bcrypt.using(rounds=rounds),
+        )
+        for rounds in BCRYPT_ROUNDS
+    ]
+    if importlib.util.find_spec("argon2") is None:
+        logger.info("argon2 is not installed, skipping it")
+        return found
+    found += [
+        Candidate(
+            scheme="argon2",
+            settings={
+                "PASSWORD_ARGON2_TIME_COST": time_cost,
+                "PASSWORD_ARGON2_MEMORY_COST": memory_cost,
+                "PASSWORD_ARGON2_PARALLELISM": parallelism,
+            },
+            work=time_cost * memory_cost,
+            hasher=argon2.using(  # type: ignore[no-untyped-call]
+                time_cost=time_cost,
+                memory_cost=memory_cost,
+                parallelism=parallelism,
+            ),
+        )
+        for time_cost, memory_cost, parallelism in ARGON2_PARAMETERS
+    ]
+    return found
+
+
+def measure(fn: Callable[[], Any], samples: int) -> tuple[float, float]:
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+    return statistics.median(durations), p99
+
+
+def time_candidate(candidate: Candidate, samples: int) -> Timing:
+    # A login is one verification against a stored hash
+    hashed = candidate.hasher.hash("calibration password")
+    p50, p99 = measure(
+        lambda: candidate.hasher.verify("calibration password", hashed), samples
+    )
+    return Timing(candidate=candidate, p50=p50, p99=p99)
+
+
+def recommend(timings: list[Timing], budget: float) -> dict[str, Timing]:
+    """
+    The most expensive candidate of each scheme within the budget.
+    """
+    best: dict[str, Timing] = {}
+    for timing in timings:
+        scheme = timing.candidate.scheme
+        if timing.p99 > budget:
+            continue
+        if scheme not in best or timing.candidate.work > best[scheme].candidate.work:
+            best[scheme] = timing
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=250.0,
+        help="p99 time one password verification may take",
+    )
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+    budget = args.budget_ms / 1000
+
+    timings: list[Timing] = []
+    too_slow: set[str] = set()
+    for candidate in candidates():
+        # Costs only go up within a scheme, don't wait on hopeless ones
+        if candidate.scheme in too_slow:
+            continue
+        timing = time_candidate(candidate, args.samples)
+        timings.append(timing)
+        logger.info(
+            "%-7s p50 %7.1f ms  p99 %7.1f ms  %s",
+            candidate.scheme,
+            timing.p50 * 1000,
+            timing.p99 * 1000,
+            candidate.describe(),
+        )
+        if timing.p50 > 2 * budget:
+            too_slow.add(candidate.scheme)
+
+    best = recommend(timings, budget)
+    if not best:
+        logger.info("No candidate verifies within %.0f ms", args.budget_ms)
+        return
+    logger.info("Within a p99 of %.0f ms per login:", args.budget_ms)
+    for scheme, timing in best.items():
+        logger.info("  %s: %s", scheme, timing.candidate.describe())
+
+
+if __name__ == "__main__":
+    main()
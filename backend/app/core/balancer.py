@@ -0,0 +1,120 @@
+import bisect
+import hashlib
+import itertools
+import time
+from collections.abc import Sequence
+from typing import Any, Literal
+
+from app.core.config import settings
+
+Strategy = Literal["least_outstanding", "consistent_hash", "round_robin"]
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class Replica:
+    """
+    One instance of a service, with its in-flight calls and health.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self.outstanding = 0
+        self.requests = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.times_ejected = 0
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected": self.ejected,
+            "times_ejected": self.times_ejected,
+        }
+
+
+class LoadBalancer:
+    """
+    Picks one of a service's replicas for each call.
+
+    "least_outstanding" sends calls to the replica with the fewest calls in
+    flight, "consistent_hash" keeps calls with the same key (a user id) on
+    the same replica while the set of replicas is stable, and "round_robin"
+    takes turns. Replicas that fail too many calls in a row are ejected for a
+    while (passive health checking), unless that would leave none.
+    """
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        *,
+        strategy: Strategy | None = None,
+        eject_after: int | None = None,
+        eject_seconds: float | None = None,
+        virtual_nodes: int = 100,
+    ) -> None:
+        if not base_urls:
+            raise ValueError("A service needs at least one replica")
+        self.replicas = [Replica(base_url) for base_url in base_urls]
+        self.strategy: Strategy = strategy or settings.GATEWAY_LOAD_BALANCING
+        self.eject_after = eject_after or settings.GATEWAY_EJECT_CONSECUTIVE_FAILURES
+        self.eject_seconds = (
+            settings.GATEWAY_EJECT_SECONDS if eject_seconds is None else eject_seconds
+        )
+        # Each replica sits at several points of the ring to even out the load
+        self._ring = sorted(
+            (_hash(f"{replica.base_url}#{i}"), index)
+            for index, replica in enumerate(self.replicas)
+            for i in range(virtual_nodes)
+        )
+        self._turns = itertools.count()
+
+    def healthy(self) -> list[Replica]:
+        live = [replica for replica in self.replicas if not replica.ejected]
+        return live or self.replicas
+
+    def pick(self, key: str | None = None, exclude: Replica | None = None) -> Replica:
+        candidates = self.healthy()
+        if exclude is not None and len(candidates) > 1:
+            candidates = [replica for replica in candidates if replica is not exclude]
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.strategy == "consistent_hash" and key is not None:
+            return self._by_hash(key, candidates)
+        if self.strategy == "round_robin":
+            return candidates[next(self._turns) % len(candidates)]
+        return min(candidates, key=lambda r: (r.outstanding, r.requests))
+
+    def _by_hash(self, key: str, candidates: list[Replica]) -> Replica:
+        # Walk the ring clockwise from the key to the first usable replica
+        start = bisect.bisect(self._ring, (_hash(key), -1))
+        for offset in range(len(self._ring)):
+            _, index = self._ring[(start + offset) % len(self._ring)]
+            if self.replicas[index] in candidates:
+                return self.replicas[index]
+        return candidates[0]
+
+    def record(self, replica: Replica, *, success: bool) -> None:
+        if success:
+            replica.consecutive_failures = 0
+            return
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.eject_after and not replica.ejected:
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+            replica.times_ejected += 1
+            replica.consecutive_failures = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "replicas": [replica.snapshot() for replica in self.replicas],
+        }
@@ -0,0 +1,128 @@
+import time
+from collections import deque
+from typing import Any, Literal
+
+from app.core.config import settings
+
+State = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to one upstream service.
+
+    Tracks the outcome of the last calls while closed and opens when too many
+    of them fail or are too slow. While open, calls are rejected right away.
+    After a cool-down a few probe calls are let through (half-open), and the
+    circuit closes again once they all succeed.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int | None = None,
+        min_calls: int | None = None,
+        error_rate: float | None = None,
+        slow_call_seconds: float | None = None,
+        slow_call_rate: float | None = None,
+        open_seconds: float | None = None,
+        half_open_probes: int | None = None,
+    ) -> None:
+        self.window = window or settings.GATEWAY_BREAKER_WINDOW
+        self.min_calls = min_calls or settings.GATEWAY_BREAKER_MIN_CALLS
+        self.error_rate = error_rate or settings.GATEWAY_BREAKER_ERROR_RATE
+        self.slow_call_seconds = (
+            slow_call_seconds or settings.GATEWAY_BREAKER_SLOW_CALL_SECONDS
+        )
+        self.slow_call_rate = slow_call_rate or settings.GATEWAY_BREAKER_SLOW_CALL_RATE
+        self.open_seconds = (
+            settings.GATEWAY_BREAKER_OPEN_SECONDS
+            if open_seconds is None
+            else open_seconds
+        )
+        self.half_open_probes = (
+            half_open_probes or settings.GATEWAY_BREAKER_HALF_OPEN_PROBES
+        )
+        self.state: State = "closed"
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        # (failed, slow) for each of the last calls while closed
+        self._calls: deque[tuple[bool, bool]] = deque(maxlen=self.window)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._calls.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def _close(self) -> None:
+        self.state = "closed"
+        self._calls.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        if self.state == "open":
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """
+        Give back an allowed call that was abandoned without an outcome.
+        """
+        if self.state == "half_open" and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def record(self, *, success: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        if self.state == "half_open":
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success or slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._close()
+            return
+        if self.state == "open":
+            # A call allowed before the circuit opened
+            return
+        self._calls.append((not success, slow))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._calls)
+        slow_calls = sum(slow for _, slow in self._calls)
+        if (
+            failures / len(self._calls) >= self.error_rate
+            or slow_calls / len(self._calls) >= self.slow_call_rate
+        ):
+            self._open()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "calls": len(self._calls),
+            "failures": sum(failed for failed, _ in self._calls),
+            "slow_calls": sum(slow for _, slow in self._calls),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 3),
+        }
@@ -0,0 +1,100 @@
+import asyncio
+from collections import deque
+from typing import Any, Literal
+
+from app.core.config import settings
+
+Reason = Literal["queue_full", "timeout"]
+
+
+class BulkheadFull(Exception):
+    def __init__(self, reason: Reason) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Bulkhead:
+    """
+    Concurrency limit for calls to one upstream service.
+
+    Up to `max_concurrent` calls run at once, a bounded number more wait in
+    line for a slot in arrival order. Calls are shed with BulkheadFull when
+    the line is full or they have waited `max_wait` seconds, so a slow
+    service can't tie up the gateway's capacity for the other services.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int | None = None,
+        max_queue: int | None = None,
+        max_wait: float | None = None,
+    ) -> None:
+        self.max_concurrent = max_concurrent or settings.GATEWAY_BULKHEAD_MAX_CONCURRENT
+        self.max_queue = (
+            settings.GATEWAY_BULKHEAD_MAX_QUEUE if max_queue is None else max_queue
+        )
+        self.max_wait = (
+            settings.GATEWAY_BULKHEAD_MAX_WAIT if max_wait is None else max_wait
+        )
+        self.active = 0
+        self.admitted = 0
+        self.queued_peak = 0
+        self.rejected: dict[Reason, int] = {"queue_full": 0, "timeout": 0}
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: Reason) -> BulkheadFull:
+        self.rejected[reason] += 1
+        return BulkheadFull(reason)
+
+    async def acquire(self, timeout: float | None = None) -> None:
+        """
+        Take a slot, waiting at most `max_wait` or `timeout` seconds for it.
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        wait = self.max_wait if timeout is None else min(self.max_wait, timeout)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_peak = max(self.queued_peak, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, timeout=max(0.0, wait))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The slot may have been handed over just as the wait ended
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout")
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter, if any is still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active = max(0, self.active - 1)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_peak": self.queued_peak,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
@@ -1,4 +1,6 @@
+import os
 import secrets
+import tempfile
 import warnings
 from typing import Annotated, Any, Literal
 
@@ -32,8 +34,14 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Access tokens carry the user's is_active and is_superuser claims, so
+    # they are kept short. Refresh tokens get new ones and are rotated on use
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # 8 days
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Each worker reloads the inactive users, whose access tokens are refused
+    # before they expire, this often
+    TOKEN_REVOCATION_RELOAD_SECONDS: float = 30.0
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -68,6 +76,19 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pools of each worker process, one for the sync and one for
+    # the async engine, at most POOL_SIZE + MAX_OVERFLOW connections each,
+    # keep workers * 2 * that under Postgres' max_connections. Connections
+    # are replaced after RECYCLE seconds (-1 never) and tested before use
+    # with PRE_PING. STATEMENT_TIMEOUT in milliseconds applies to every
+    # statement, 0 for none
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT: int = 0
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -90,6 +111,141 @@ class Settings(BaseSettings):
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    # Response compression, zstd and br need the "compression" extra installed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # New passwords are hashed with the first scheme. Hashes with another
+    # scheme or other costs are rehashed at the user's next login. Measure the
+    # costs on the host with `python -m app.calibrate_hashing`, argon2 needs
+    # the "argon2" extra installed
+    PASSWORD_HASH_SCHEMES: list[Literal["bcrypt", "argon2"]] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    # Hashing runs in a pool of PASSWORD_HASH_WORKERS processes per worker, 0
+    # to run it in the request's thread. Each call waiting on the pool holds
+    # one of the 40 threads the sync routes run in, so calls beyond
+    # MAX_PENDING queued or running, twice the workers by default, are
+    # answered with 503 right away
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int | None = None
+    PASSWORD_HASH_TIMEOUT: float = 10.0
+
+    # Failed logins per email and per client IP within the window, at the
+    # limit further attempts get a 429 for LOCKOUT seconds without the
+    # password being checked. Counted in a SQLite file shared by the workers
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_DB: str = os.path.join(tempfile.gettempdir(), "login_throttle.db")
+    LOGIN_THROTTLE_WINDOW_SECONDS: float = 300.0
+    LOGIN_THROTTLE_LOCKOUT_SECONDS: float = 900.0
+    LOGIN_THROTTLE_MAX_FAILURES_PER_EMAIL: int = 5
+    LOGIN_THROTTLE_MAX_FAILURES_PER_IP: int = 50
+
+    # Users resolved from access tokens are cached per worker process, so a
+    # change made through another worker is seen after at most the TTL
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+
+    # API keys are stored as HMAC-SHA256 digests keyed with this, defaults to
+    # SECRET_KEY. Changing it invalidates all keys
+    API_KEY_HMAC_KEY: str | None = None
+    # Resolved API keys are cached per worker process, a key revoked through
+    # another worker keeps working for at most the TTL
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0
+    API_KEY_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Microservices behind the API gateway
+    APPOINTMENTS_SERVICE_URL: str = "http://localhost:8001/api/v1/appointments"
+    ITEMS_SERVICE_URL: str = "http://localhost:8002/api/v1/items"
+    # Replicas of each service as comma separated URLs, used instead of the
+    # single URL above when set
+    APPOINTMENTS_SERVICE_URLS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    ITEMS_SERVICE_URLS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    # How calls are spread over a service's replicas, per service overrides
+    # as "<service>" -> strategy. "consistent_hash" keeps a user on one replica
+    GATEWAY_LOAD_BALANCING: Literal[
+        "least_outstanding", "consistent_hash", "round_robin"
+    ] = "least_outstanding"
+    GATEWAY_LOAD_BALANCING_OVERRIDES: dict[
+        str, Literal["least_outstanding", "consistent_hash", "round_robin"]
+    ] = {}
+    # Replicas failing this many calls in a row are taken out for a while
+    GATEWAY_EJECT_CONSECUTIVE_FAILURES: int = 5
+    GATEWAY_EJECT_SECONDS: float = 30.0
+    # "inprocess" runs the services' apps inside the backend instead of
+    # calling them over HTTP, the URLs' paths are still used for routing
+    GATEWAY_MODE: Literal["http", "inprocess"] = "http"
+    # Where the services' code is for GATEWAY_MODE=inprocess, the directory
+    # holding items-service/, appointments-service/ and shared/. Defaults to
+    # backend/services, /app/services in the backend image
+    GATEWAY_SERVICES_DIR: str | None = None
+    # Connection pool of each upstream client, connections are per service host
+    GATEWAY_MAX_CONNECTIONS: int = 100
+    GATEWAY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GATEWAY_KEEPALIVE_EXPIRY: float = 5.0
+    GATEWAY_POOL_TIMEOUT: float = 5.0
+    # Talk HTTP/2 to the services, so concurrent calls share a few
+    # multiplexed connections. Plain http:// URLs use h2c with prior
+    # knowledge, so the services must be served by hypercorn
+    # (SERVICE_HTTP2=true). Needs the "http2" extra installed
+    GATEWAY_HTTP2: bool = False
+    # Default time budget of a proxied request, and per route budgets as
+    # "<service>:<path pattern>" -> seconds
+    GATEWAY_TIMEOUT: float = 30.0
+    GATEWAY_ROUTE_TIMEOUTS: dict[str, float] = {
+        "appointments:/hospitals*": 5.0,
+        "appointments:/doctors/*/time-slots": 5.0,
+    }
+    # Pipe proxied bodies through in chunks instead of buffering them
+    GATEWAY_STREAMING: bool = True
+    GATEWAY_STREAM_CHUNK_SIZE: int = 64 * 1024
+    # Cached GET routes as "<service>:<path pattern>" and their TTL in seconds
+    GATEWAY_CACHE_TTLS: dict[str, float] = {
+        "appointments:/hospitals": 300.0,
+        "appointments:/hospitals/*/doctors": 300.0,
+    }
+    GATEWAY_CACHE_MAX_ENTRIES: int = 1024
+    # GET routes where identical concurrent requests share one upstream call
+    GATEWAY_COALESCE_ROUTES: list[str] = [
+        "appointments:/hospitals",
+        "appointments:/hospitals/*/doctors",
+        "appointments:/doctors/*/time-slots",
+    ]
+    # Idempotent GET routes where a slow first attempt gets a second one, to
+    # another replica when there is one. The first attempt may take up to
+    # the PERCENTILE of the service's recent latencies, and hedges are kept
+    # to BUDGET_RATIO of the calls
+    GATEWAY_HEDGE_ROUTES: list[str] = []
+    GATEWAY_HEDGE_PERCENTILE: float = 95.0
+    GATEWAY_HEDGE_MIN_DELAY: float = 0.01
+    GATEWAY_HEDGE_MIN_SAMPLES: int = 20
+    GATEWAY_HEDGE_BUDGET_RATIO: float = 0.1
+    GATEWAY_HEDGE_BUDGET_BURST: float = 10.0
+    # Time budget of each upstream call made for an aggregated response
+    GATEWAY_AGGREGATE_PART_TIMEOUT: float = 3.0
+    # Circuit breaker of each upstream, rates are over the last WINDOW calls
+    GATEWAY_BREAKER_WINDOW: int = 20
+    GATEWAY_BREAKER_MIN_CALLS: int = 10
+    GATEWAY_BREAKER_ERROR_RATE: float = 0.5
+    GATEWAY_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    GATEWAY_BREAKER_SLOW_CALL_RATE: float = 0.8
+    GATEWAY_BREAKER_OPEN_SECONDS: float = 30.0
+    GATEWAY_BREAKER_HALF_OPEN_PROBES: int = 1
+    # Calls each upstream may have outstanding, per service overrides as
+    # "<service>" -> limit. More calls wait in a bounded line for up to
+    # MAX_WAIT seconds, then get a 503 with Retry-After
+    GATEWAY_BULKHEAD_MAX_CONCURRENT: int = 50
+    GATEWAY_BULKHEAD_LIMITS: dict[str, int] = {}
+    GATEWAY_BULKHEAD_MAX_QUEUE: int = 100
+    GATEWAY_BULKHEAD_MAX_WAIT: float = 1.0
+    GATEWAY_BULKHEAD_RETRY_AFTER: int = 1
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -1,7 +1,11 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.pool import TimedAsyncQueuePool, TimedQueuePool
 from app.models import (
     Doctor,
     DoctorTimeSlot,
@@ -10,7 +14,29 @@ from app.models import (
     UserCreate,
 )
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+# The sync and the async engine have a pool each, sized the same
+pool_options: dict[str, Any] = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "connect_args": (
+        {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT}"}
+        if settings.DB_STATEMENT_TIMEOUT
+        else {}
+    ),
+}
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), poolclass=TimedQueuePool, **pool_options
+)
+# psycopg's async connections, for the routes that are async def
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedAsyncQueuePool,
+    **pool_options,
+)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
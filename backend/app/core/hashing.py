@@ -0,0 +1,121 @@
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+T = TypeVar("T")
+
+
+class HashingBusy(Exception):
+    """
+    Too many password hashes are already waiting for the pool.
+    """
+
+
+class HashPool:
+    """
+    Bounded process pool for CPU bound password hashing.
+
+    A bcrypt call takes a few hundred milliseconds of CPU. Run in a separate
+    process it doesn't compete for the worker's GIL, and at most `workers`
+    of them run at once. The caller's thread, one of the threadpool's the
+    sync routes run in, is held while it waits. So no more than
+    `max_pending` calls may be queued or running, by default twice as many
+    as there are workers, and beyond that callers get HashingBusy right away
+    rather than piling up in the threads the other requests need.
+    """
+
+    def __init__(
+        self, *, workers: int, max_pending: int | None = None, timeout: float
+    ) -> None:
+        self.workers = workers
+        self.max_pending = 2 * workers if max_pending is None else max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Not forked, the worker's threads and sockets stay behind
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run `fn(*args)` in the pool and wait for the result.
+        """
+        if self.workers <= 0:
+            return fn(*args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusy()
+            self.pending += 1
+            executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException as e:
+            self._job_done(None)
+            if isinstance(e, BrokenProcessPool):
+                self._discard(executor)
+            raise
+        # Pending until the job is over, one that timed out may still be
+        # queued or running in the pool
+        future.add_done_callback(self._job_done)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Dropped if it's still queued, a running one is left to finish
+            future.cancel()
+            raise HashingBusy()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def _job_done(self, _future: Future[Any] | None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        # A worker died, start a new pool for the next calls
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+async def hashing_busy_handler(_request: Request, _exc: Exception) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password checks in progress, try again."},
+        headers={"Retry-After": "1"},
+    )
@@ -0,0 +1,82 @@
+from collections import deque
+from typing import Any
+
+from app.core.config import settings
+
+
+class HedgePolicy:
+    """
+    When to send a second attempt of a slow read to one upstream service.
+
+    The hedge delay is a percentile of the service's recent latencies, so
+    only the slowest calls get a second attempt. Hedges are paid for out of
+    a retry budget that each call adds a fraction of a token to, which
+    keeps them to a set share of the traffic when the whole service is slow.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float | None = None,
+        min_delay: float | None = None,
+        min_samples: int | None = None,
+        budget_ratio: float | None = None,
+        budget_burst: float | None = None,
+        window: int = 1000,
+    ) -> None:
+        self.percentile = percentile or settings.GATEWAY_HEDGE_PERCENTILE
+        self.min_delay = (
+            settings.GATEWAY_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        )
+        self.min_samples = (
+            settings.GATEWAY_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        )
+        self.budget_ratio = (
+            settings.GATEWAY_HEDGE_BUDGET_RATIO
+            if budget_ratio is None
+            else budget_ratio
+        )
+        self.budget_burst = budget_burst or settings.GATEWAY_HEDGE_BUDGET_BURST
+        self.tokens = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+        self.over_budget = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def observe(self, duration: float) -> None:
+        self._latencies.append(duration)
+
+    def delay(self) -> float | None:
+        """
+        Seconds to wait for the first attempt, None to not hedge at all.
+        """
+        if not self._latencies or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def start_call(self) -> None:
+        self.calls += 1
+        self.tokens = min(self.budget_burst, self.tokens + self.budget_ratio)
+
+    def allow_hedge(self) -> bool:
+        # Rounded so that summed fractions of a token add up to whole ones
+        if round(self.tokens, 9) < 1:
+            self.over_budget += 1
+            return False
+        self.tokens -= 1
+        self.hedges += 1
+        return True
+
+    def snapshot(self) -> dict[str, Any]:
+        delay = self.delay()
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "over_budget": self.over_budget,
+            "tokens": round(self.tokens, 3),
+            "delay": None if delay is None else round(delay, 3),
+        }
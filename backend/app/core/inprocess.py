@@ -0,0 +1,49 @@
+import importlib
+import sys
+from pathlib import Path
+
+from starlette.types import ASGIApp
+
+from app.core.config import settings
+
+# Top-level modules each service is made of, see services/*-service
+SERVICE_MODULES = ("main", "routes", "models")
+
+
+def services_dir() -> Path:
+    if settings.GATEWAY_SERVICES_DIR:
+        return Path(settings.GATEWAY_SERVICES_DIR)
+    return Path(__file__).resolve().parents[2] / "services"
+
+
+def load_service_app(name: str) -> ASGIApp:
+    """
+    Import a microservice's FastAPI app to serve it in-process.
+
+    The services are written to run from their own directory with top-level
+    `main`, `routes` and `models` modules, which would clash between them.
+    Each service is imported on its own and its modules are kept under
+    `<name>_service.*` afterwards.
+    """
+    directory = services_dir() / f"{name}-service"
+    if not directory.is_dir():
+        raise RuntimeError(
+            f"Service {name!r} not found: {directory} is not a directory. Set"
+            " GATEWAY_SERVICES_DIR to the directory holding the services' code"
+        )
+    saved = {m: sys.modules.pop(m) for m in SERVICE_MODULES if m in sys.modules}
+    # The service's own directory for its modules, its parent for `shared`
+    paths = [str(directory), str(directory.parent)]
+    sys.path[:0] = paths
+    try:
+        main = importlib.import_module("main")
+    finally:
+        for path in paths:
+            sys.path.remove(path)
+        for module in SERVICE_MODULES:
+            loaded = sys.modules.pop(module, None)
+            if loaded is not None:
+                sys.modules[f"{name}_service.{module}"] = loaded
+        sys.modules.update(saved)
+    app: ASGIApp = main.app
+    return app
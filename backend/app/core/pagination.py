@@ -0,0 +1,180 @@
+import base64
+import binascii
+import uuid
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, Literal, TypeVar
+
+from sqlalchemy import Table, text
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+# How a page counts the rows of all pages. "exact" counts them in the same
+# query as the page, "estimate" takes the planner's row estimate and "none"
+# doesn't count, has_more tells whether there's a next page
+CountStrategy = Literal["exact", "estimate", "none"]
+
+ESTIMATE_FROM_STATS = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+)
+
+
+@dataclass
+class Page(Generic[T]):
+    data: list[T]
+    count: int | None
+    next_cursor: str | None
+    has_more: bool
+
+
+def encode_cursor(key: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    """
+    The key a cursor points after, ValueError if it isn't a cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if len(raw) != 16:
+        raise ValueError("Invalid cursor")
+    return uuid.UUID(bytes=raw)
+
+
+def paginate(
+    statement: SelectOfScalar[T],
+    key: Any,
+    *,
+    skip: int,
+    limit: int,
+    cursor: uuid.UUID | None,
+) -> SelectOfScalar[T]:
+    """
+    A page of the statement's rows in key order, after the cursor if given,
+    else after skip rows.
+
+    One row more than the limit is fetched, it tells whether there's a next
+    page, see split_page.
+    """
+    statement = statement.order_by(key)
+    if cursor is not None:
+        statement = statement.where(key > cursor)
+    else:
+        statement = statement.offset(skip)
+    return statement.limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[T], limit: int, key: Callable[[T], uuid.UUID]
+) -> tuple[list[T], str | None]:
+    """
+    The page and the cursor of the next one, None on the last page.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
+
+
+def count_rows(session: Session, statement: SelectOfScalar[Any]) -> int:
+    query = select(func.count()).select_from(statement.order_by(None).subquery())
+    return session.exec(query).one()
+
+
+def estimate_rows(session: Session, statement: SelectOfScalar[Any]) -> int:
+    """
+    The planner's estimate of the statement's row count, exact off Postgres.
+
+    A whole table is estimated from pg_class.reltuples, anything filtered
+    from the row estimate of its plan. Both are as current as the last
+    ANALYZE of the table.
+    """
+    dialect = session.get_bind().dialect
+    if dialect.name != "postgresql":
+        return count_rows(session, statement)
+    froms = statement.get_final_froms()
+    if statement.whereclause is None and len(froms) == 1:
+        (table,) = froms
+        if isinstance(table, Table):
+            name = dialect.identifier_preparer.format_table(table)
+            estimate = session.execute(ESTIMATE_FROM_STATS, {"table": name}).scalar()
+            # -1 for a table that was never analyzed
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+    compiled = statement.compile(dialect=dialect)
+    connection = session.connection()
+    (plan,) = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).one()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def fetch_page(
+    session: Session,
+    statement: SelectOfScalar[T],
+    key: Any,
+    *,
+    skip: int,
+    limit: int,
+    cursor: uuid.UUID | None,
+    count: CountStrategy,
+) -> Page[T]:
+    """
+    A page of the statement's rows, see paginate, counted as asked.
+    """
+    query = paginate(statement, key, skip=skip, limit=limit, cursor=cursor)
+    total: int | None = None
+    # After a cursor the query only sees the rows that follow it, and past
+    # the last page there's no row to carry the count, count those apart
+    if count == "exact" and cursor is None:
+        rows = session.execute(query.add_columns(func.count().over())).all()
+        items: Sequence[T] = [row[0] for row in rows]
+        if rows:
+            total = rows[0][1]
+        elif not skip:
+            total = 0
+    else:
+        items = session.exec(query).all()
+    if total is None and count == "exact":
+        total = count_rows(session, statement)
+    elif count == "estimate":
+        total = estimate_rows(session, statement)
+
+    data, next_cursor = split_page(items, limit, lambda item: getattr(item, key.key))
+    return Page(
+        data=data,
+        count=total,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
+    )
+
+
+async def fetch_page_async(
+    session: AsyncSession,
+    statement: SelectOfScalar[T],
+    key: Any,
+    *,
+    skip: int,
+    limit: int,
+    cursor: uuid.UUID | None,
+    count: CountStrategy,
+) -> Page[T]:
+    def fetch(sync_session: Session) -> Page[T]:
+        return fetch_page(
+            sync_session,
+            statement,
+            key,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count=count,
+        )
+
+    # Typed as SQLAlchemy's, the sync session is sqlmodel's Session
+    return await session.run_sync(fetch)  # type: ignore[arg-type]
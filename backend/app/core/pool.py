@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts take.
+
+    That includes waiting for a connection to be returned when the pool and
+    its overflow are all checked out, opening a new one and the pre-ping.
+    """
+
+    def __init__(self, *args: Any, window: int = 1000, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._waits: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            with self._lock:
+                self.checkouts += 1
+                self.max_wait = max(self.max_wait, wait)
+                self._waits.append(wait)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+
+        def percentile(p: int) -> float | None:
+            if not waits:
+                return None
+            index = min(len(waits) - 1, int(len(waits) * p / 100))
+            return round(waits[index] * 1000, 3)
+
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            # Connections open beyond the pool size
+            "overflow": max(0, self.overflow()),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checkout_ms": {
+                "p50": percentile(50),
+                "p99": percentile(99),
+                "max": round(self.max_wait * 1000, 3),
+            },
+        }
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """
+    TimedQueuePool for an async engine.
+    """
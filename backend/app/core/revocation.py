@@ -0,0 +1,81 @@
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+
+class RevocationList:
+    """
+    Users whose access tokens are refused before the tokens expire.
+
+    Access tokens carry the user's flags, so they are authorized without
+    loading the user. This keeps the ids of inactive users and of deleted
+    ones, reloaded from the database every `reload_interval` seconds, and
+    the times at which a user's tokens were revoked (deleted, or flags
+    changed), kept for as long as a token issued before then can still be
+    valid.
+    """
+
+    def __init__(self, *, reload_interval: float, token_lifetime: float) -> None:
+        self.reload_interval = reload_interval
+        self.token_lifetime = token_lifetime
+        self.reloads = 0
+        self._inactive: set[str] = set()
+        self._revoked_at: dict[str, float] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def needs_reload(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.reload_interval
+        )
+
+    def reload(
+        self,
+        inactive_user_ids: Iterable[str | uuid.UUID],
+        revoked: Mapping[str | uuid.UUID, float] | None = None,
+    ) -> None:
+        """
+        Replace the inactive users, and add the revocations made elsewhere,
+        by user id with the time they were made at.
+        """
+        inactive = {str(user_id) for user_id in inactive_user_ids}
+        # Tokens issued before this have expired on their own
+        horizon = time.time() - self.token_lifetime
+        with self._lock:
+            self._inactive = inactive
+            revoked_at = dict(self._revoked_at)
+            for user_id, at in (revoked or {}).items():
+                revoked_at[str(user_id)] = max(at, revoked_at.get(str(user_id), at))
+            self._revoked_at = {
+                user_id: at for user_id, at in revoked_at.items() if at > horizon
+            }
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+
+    def revoke(self, user_id: str | uuid.UUID, *, inactive: bool = False) -> None:
+        """
+        Refuse the user's tokens issued until now, and all if `inactive`.
+        """
+        with self._lock:
+            self._revoked_at[str(user_id)] = time.time()
+            if inactive:
+                self._inactive.add(str(user_id))
+            else:
+                self._inactive.discard(str(user_id))
+
+    def is_inactive(self, user_id: str) -> bool:
+        return user_id in self._inactive
+
+    def is_revoked(self, user_id: str, issued_at: float) -> bool:
+        revoked_at = self._revoked_at.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inactive": len(self._inactive),
+            "revoked": len(self._revoked_at),
+            "reloads": self.reloads,
+        }
@@ -1,3 +1,7 @@
+import hashlib
+import hmac
+import secrets
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
@@ -5,23 +9,148 @@ import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.hashing import HashPool
+from app.core.throttle import LoginThrottle
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def make_crypt_context() -> CryptContext:
+    """
+    Hashes new passwords with the first of PASSWORD_HASH_SCHEMES.
+
+    Hashes made with another scheme, or with other costs than configured,
+    need an update, so a cost change is rolled out as users log in.
+    """
+    options: dict[str, Any] = {}
+    if "bcrypt" in settings.PASSWORD_HASH_SCHEMES:
+        rounds = settings.PASSWORD_BCRYPT_ROUNDS
+        options |= {
+            "bcrypt__default_rounds": rounds,
+            "bcrypt__min_rounds": rounds,
+            "bcrypt__max_rounds": rounds,
+        }
+    if "argon2" in settings.PASSWORD_HASH_SCHEMES:
+        time_cost = settings.PASSWORD_ARGON2_TIME_COST
+        options |= {
+            "argon2__default_rounds": time_cost,
+            "argon2__min_rounds": time_cost,
+            "argon2__max_rounds": time_cost,
+            "argon2__memory_cost": settings.PASSWORD_ARGON2_MEMORY_COST,
+            "argon2__parallelism": settings.PASSWORD_ARGON2_PARALLELISM,
+        }
+    return CryptContext(
+        schemes=settings.PASSWORD_HASH_SCHEMES, deprecated="auto", **options
+    )
+
+
+pwd_context = make_crypt_context()
+
+# Where hashing runs, see verify_password and get_password_hash
+hash_pool = HashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+# Failed logins, checked before a password is verified
+login_throttle = LoginThrottle(
+    settings.LOGIN_THROTTLE_DB,
+    window=settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    lockout=settings.LOGIN_THROTTLE_LOCKOUT_SECONDS,
+    limits={
+        "email": settings.LOGIN_THROTTLE_MAX_FAILURES_PER_EMAIL,
+        "ip": settings.LOGIN_THROTTLE_MAX_FAILURES_PER_IP,
+    },
+)
 
 
 ALGORITHM = "HS256"
 
+# Marks API keys, and tells them from access tokens
+API_KEY_PREFIX = "ak_"
+
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+def create_access_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    *,
+    is_active: bool,
+    is_superuser: bool,
+) -> str:
+    """
+    The user's flags are signed into the token, so it can be authorized
+    without loading the user, see deps.get_token_user.
+    """
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "exp": now + expires_delta,
+        # Not rounded to the second, to compare with revocation times
+        "iat": now.timestamp(),
+        "sub": str(subject),
+        "type": "access",
+        "is_active": is_active,
+        "is_superuser": is_superuser,
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def create_refresh_token(
+    subject: str | Any, token_id: uuid.UUID, expires_at: datetime
+) -> str:
+    to_encode = {
+        "exp": expires_at,
+        "sub": str(subject),
+        "type": "refresh",
+        "jti": str(token_id),
+    }
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+
+def generate_api_key() -> str:
+    return API_KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def api_key_digest(key: str) -> str:
+    """
+    Keys are random, a keyed hash is enough and takes microseconds to check.
+    """
+    secret = settings.API_KEY_HMAC_KEY or settings.SECRET_KEY
+    return hmac.new(secret.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def _verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    verified = pwd_context.verify(plain_password, hashed_password)
+    if verified and pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return verified, None
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    # Raises HashingBusy when the hash pool is saturated
+    return hash_pool.run(_verify, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return hash_pool.run(_hash, password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password, and rehash it if its hash is due for an update.
+
+    Returns whether it matched and the new hash, if one was made.
+    """
+    return hash_pool.run(_verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,123 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failure (key TEXT NOT NULL, at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS failure_key_at ON failure (key, at);
+CREATE TABLE IF NOT EXISTS lockout (key TEXT PRIMARY KEY, until REAL NOT NULL);
+"""
+
+
+class LoginThrottle:
+    """
+    Sliding window of failed logins per key, with a lockout once over limit.
+
+    Keys are "<kind>:<value>" (an email or a client IP) with a limit per
+    kind. The counters live in a SQLite file, so all worker processes on a
+    host share them, the values are stored hashed. Checking is a single
+    indexed read, done before the password is verified.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        window: float,
+        lockout: float,
+        limits: dict[str, int],
+    ) -> None:
+        self.path = path
+        self.window = window
+        self.lockout = lockout
+        self.limits = limits
+        self.rejected = 0
+        self.lockouts = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _key(key: str) -> str:
+        kind, _, value = key.partition(":")
+        return f"{kind}:{hashlib.sha256(value.lower().encode()).hexdigest()}"
+
+    def retry_after(self, keys: Sequence[str]) -> int | None:
+        """
+        Seconds until all of the keys are unlocked, None if none is locked.
+        """
+        hashed = [self._key(key) for key in keys]
+        now = time.time()
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT max(until) FROM lockout"
+                    f" WHERE key IN ({','.join('?' * len(hashed))}) AND until > ?",
+                    (*hashed, now),
+                )
+                .fetchone()
+            )
+            until: float | None = row[0]
+            if until is None:
+                return None
+            self.rejected += 1
+        return max(1, math.ceil(until - now))
+
+    def record_failure(self, keys: Sequence[str]) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            # One writer at a time across processes, so counts stay exact
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for key in keys:
+                    hashed = self._key(key)
+                    db.execute(
+                        "DELETE FROM failure WHERE key = ? AND at <= ?",
+                        (hashed, now - self.window),
+                    )
+                    db.execute("INSERT INTO failure VALUES (?, ?)", (hashed, now))
+                    (failures,) = db.execute(
+                        "SELECT count(*) FROM failure WHERE key = ?", (hashed,)
+                    ).fetchone()
+                    if failures >= self.limits[key.partition(":")[0]]:
+                        db.execute(
+                            "INSERT OR REPLACE INTO lockout VALUES (?, ?)",
+                            (hashed, now + self.lockout),
+                        )
+                        db.execute("DELETE FROM failure WHERE key = ?", (hashed,))
+                        self.lockouts += 1
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM failure WHERE key = ?", (self._key(key),)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM failure")
+            db.execute("DELETE FROM lockout")
+
+    def stats(self) -> dict[str, Any]:
+        return {"rejected": self.rejected, "lockouts": self.lockouts}
@@ -0,0 +1,108 @@
+from collections.abc import Sequence
+
+import httpx
+
+from app.core.balancer import LoadBalancer
+from app.core.breaker import CircuitBreaker
+from app.core.bulkhead import Bulkhead
+from app.core.config import settings
+from app.core.hedging import HedgePolicy
+from app.core.inprocess import load_service_app
+
+
+class Upstream:
+    """
+    A microservice behind the API gateway with its long-lived HTTP client.
+
+    The client keeps a pool of keep-alive connections to the service, so
+    proxied requests don't pay a new TCP connect each time. A service can
+    run as several replicas, its balancer picks one for each call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_urls: str | Sequence[str],
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.name = name
+        if isinstance(base_urls, str):
+            base_urls = [base_urls]
+        self.balancer = LoadBalancer(
+            base_urls, strategy=settings.GATEWAY_LOAD_BALANCING_OVERRIDES.get(name)
+        )
+        self.transport = transport
+        self.breaker = CircuitBreaker()
+        self.hedging = HedgePolicy()
+        self.bulkhead = Bulkhead(
+            max_concurrent=settings.GATEWAY_BULKHEAD_LIMITS.get(name)
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    def open(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            return
+        self._client = httpx.AsyncClient(
+            transport=self.transport,
+            http1=not settings.GATEWAY_HTTP2,
+            http2=settings.GATEWAY_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.GATEWAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GATEWAY_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.GATEWAY_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.GATEWAY_TIMEOUT, pool=settings.GATEWAY_POOL_TIMEOUT
+            ),
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Opened in the app lifespan, but don't fail if used outside of it
+        if self._client is None or self._client.is_closed:
+            self.open()
+        assert self._client is not None
+        return self._client
+
+
+def service_transport(name: str) -> httpx.AsyncBaseTransport | None:
+    """
+    Transport to a service, None to call it over the network.
+
+    In-process, requests go straight to the service's ASGI app with no
+    socket or connection pool in between.
+    """
+    if settings.GATEWAY_MODE != "inprocess":
+        return None
+    return httpx.ASGITransport(app=load_service_app(name))
+
+
+appointments = Upstream(
+    "appointments",
+    settings.APPOINTMENTS_SERVICE_URLS or settings.APPOINTMENTS_SERVICE_URL,
+    transport=service_transport("appointments"),
+)
+items = Upstream(
+    "items",
+    settings.ITEMS_SERVICE_URLS or settings.ITEMS_SERVICE_URL,
+    transport=service_transport("items"),
+)
+
+upstreams: dict[str, Upstream] = {
+    upstream.name: upstream for upstream in (appointments, items)
+}
+
+
+def open_upstreams() -> None:
+    for upstream in upstreams.values():
+        upstream.open()
+
+
+async def close_upstreams() -> None:
+    for upstream in upstreams.values():
+        await upstream.aclose()
@@ -1,10 +1,48 @@
+import time
 import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, col, delete, select, update
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.revocation import RevocationList
+from app.core.security import (
+    api_key_digest,
+    generate_api_key,
+    get_password_hash,
+    verify_and_update_password,
+)
+from app.models import (
+    ApiKey,
+    ApiKeyCreate,
+    DeletedUser,
+    Item,
+    ItemCreate,
+    RefreshToken,
+    TokenUser,
+    User,
+    UserCreate,
+    UserUpdate,
+)
+
+# Detached copies of active users resolved from access tokens, keyed by user id
+user_cache: TTLCache[str, User] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Owners of API keys keyed by the keys' digests, with when they were loaded
+api_key_cache: TTLCache[str, tuple[TokenUser, float]] = TTLCache(
+    maxsize=settings.API_KEY_CACHE_MAX_ENTRIES, ttl=settings.API_KEY_CACHE_TTL_SECONDS
+)
+
+# Users whose access tokens are refused before they expire
+revocations = RevocationList(
+    reload_interval=settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+    token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -24,13 +62,187 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
         password = user_data["password"]
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
+    flags = (db_user.is_active, db_user.is_superuser)
     db_user.sqlmodel_update(user_data, update=extra_data)
+    # Access tokens carry the old flags
+    flags_changed = (db_user.is_active, db_user.is_superuser) != flags
+    if flags_changed:
+        db_user.tokens_revoked_at = datetime.now(timezone.utc)
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    invalidate_cached_user(db_user.id)
+    if "password" in user_data:
+        # Whoever may have had the old password is logged out
+        revoke_refresh_tokens(session=session, user_id=db_user.id)
+    if flags_changed:
+        revocations.revoke(db_user.id, inactive=not db_user.is_active)
+    return db_user
+
+
+def get_cached_user(*, session: Session, user_id: str | uuid.UUID) -> User | None:
+    """
+    Get a user by id, from the in-process cache when possible.
+
+    A cached user is attached to the session without querying the database,
+    so it can be updated or deleted like a freshly loaded one.
+    """
+    cached = user_cache.get(str(user_id))
+    if cached is not None:
+        return session.merge(cached, load=False)
+    db_user = session.get(User, user_id)
+    if db_user and db_user.is_active:
+        snapshot = User.model_validate(db_user)
+        make_transient_to_detached(snapshot)
+        user_cache.set(str(db_user.id), snapshot)
     return db_user
 
 
+def invalidate_cached_user(user_id: str | uuid.UUID) -> None:
+    user_cache.pop(str(user_id))
+
+
+def reload_revocations(*, session: Session) -> None:
+    statement = select(User.id).where(col(User.is_active).is_(False))
+    inactive = session.exec(statement).all()
+    # Users deleted by any worker, while their tokens can still be valid
+    horizon = datetime.now(timezone.utc) - timedelta(seconds=revocations.token_lifetime)
+    deleted = session.exec(
+        select(DeletedUser).where(col(DeletedUser.deleted_at) > horizon)
+    ).all()
+    revoked: dict[str | uuid.UUID, float] = {
+        user.id: user.deleted_at.timestamp() for user in deleted
+    }
+    # And users whose tokens were revoked by any worker, for the same time
+    revoked_users = session.exec(
+        select(User.id, User.tokens_revoked_at).where(
+            col(User.tokens_revoked_at) > horizon
+        )
+    ).all()
+    for user_id, revoked_at in revoked_users:
+        if revoked_at is not None:
+            revoked[user_id] = revoked_at.timestamp()
+    revocations.reload(inactive, revoked)
+
+
+def record_deleted_user(*, session: Session, user_id: uuid.UUID) -> None:
+    """
+    Add a deleted user to the revocations of all workers, committed with the
+    deletion.
+    """
+    horizon = datetime.now(timezone.utc) - timedelta(seconds=revocations.token_lifetime)
+    # Drop the ones whose tokens have all expired while at it
+    statement = delete(DeletedUser).where(col(DeletedUser.deleted_at) < horizon)
+    session.exec(statement)
+    session.add(DeletedUser(id=user_id, deleted_at=datetime.now(timezone.utc)))
+
+
+def create_refresh_token(*, session: Session, user_id: uuid.UUID) -> RefreshToken:
+    now = datetime.now(timezone.utc)
+    # Drop the user's expired ones while at it
+    statement = delete(RefreshToken).where(
+        col(RefreshToken.user_id) == user_id, col(RefreshToken.expires_at) < now
+    )
+    session.exec(statement)
+    db_token = RefreshToken(
+        user_id=user_id,
+        expires_at=now + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+    )
+    session.add(db_token)
+    session.commit()
+    session.refresh(db_token)
+    return db_token
+
+
+def use_refresh_token(
+    *, session: Session, token_id: uuid.UUID, user_id: uuid.UUID
+) -> bool:
+    """
+    Mark a refresh token used, False if it was used before or doesn't exist.
+
+    Concurrent calls with the same token can't both succeed.
+    """
+    statement = (
+        update(RefreshToken)
+        .where(
+            col(RefreshToken.id) == token_id,
+            col(RefreshToken.user_id) == user_id,
+            col(RefreshToken.used).is_(False),
+        )
+        .values(used=True)
+    )
+    result = session.exec(statement)
+    session.commit()
+    return bool(result.rowcount == 1)
+
+
+def revoke_refresh_tokens(*, session: Session, user_id: uuid.UUID) -> None:
+    statement = delete(RefreshToken).where(col(RefreshToken.user_id) == user_id)
+    session.exec(statement)
+    session.commit()
+
+
+def create_api_key(
+    *, session: Session, key_in: ApiKeyCreate, user_id: uuid.UUID
+) -> tuple[ApiKey, str]:
+    """
+    Returns the key too, it can't be recovered from what is stored.
+    """
+    key = generate_api_key()
+    db_key = ApiKey.model_validate(
+        key_in,
+        update={
+            "user_id": user_id,
+            "prefix": key[:10],
+            "key_digest": api_key_digest(key),
+            "created_at": datetime.now(timezone.utc),
+        },
+    )
+    session.add(db_key)
+    session.commit()
+    session.refresh(db_key)
+    return db_key, key
+
+
+def get_api_key_user(*, session: Session, key: str) -> TokenUser | None:
+    """
+    The owner of an API key with the key's scopes, from a single indexed
+    lookup of the key's digest, or the in-process cache.
+    """
+    digest = api_key_digest(key)
+    cached = api_key_cache.get(digest)
+    if cached is not None:
+        token_user, loaded_at = cached
+        # Reloaded when the owner's flags changed since
+        if not revocations.is_revoked(str(token_user.id), loaded_at):
+            return token_user
+    loaded_at = time.time()
+    statement = (
+        select(ApiKey, User)
+        .join(User, col(ApiKey.user_id) == col(User.id))
+        .where(ApiKey.key_digest == digest)
+    )
+    row = session.exec(statement).first()
+    if not row:
+        return None
+    db_key, db_user = row
+    token_user = TokenUser(
+        id=db_user.id,
+        is_active=db_user.is_active,
+        is_superuser=db_user.is_superuser and "admin" in db_key.scopes,
+        scopes=list(db_key.scopes),
+    )
+    api_key_cache.set(digest, (token_user, loaded_at))
+    return token_user
+
+
+def revoke_api_key(*, session: Session, db_key: ApiKey) -> None:
+    digest = db_key.key_digest
+    session.delete(db_key)
+    session.commit()
+    api_key_cache.pop(digest)
+
+
 def get_user_by_email(*, session: Session, email: str) -> User | None:
     statement = select(User).where(User.email == email)
     session_user = session.exec(statement).first()
@@ -41,8 +253,16 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Hashed with an outdated scheme or cost, store the current one
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
+        invalidate_cached_user(db_user.id)
     return db_user
 
 
@@ -0,0 +1,211 @@
+"""
+Report missing and unused indexes of the database in the settings.
+
+    python -m app.index_advisor --top 20
+
+Tables are taken from pg_stat_user_tables and indexes from
+pg_stat_user_indexes, both counting since the statistics were last reset, so
+run it against a database that served a representative load. The statements
+taking the most time come from pg_stat_statements, when that extension is
+installed, and show the columns they filter on that no index starts with.
+"""
+
+import argparse
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+TABLES_QUERY = text(
+    """
+    SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0), n_live_tup
+    FROM pg_stat_user_tables
+    WHERE schemaname = current_schema()
+    """
+)
+INDEXES_QUERY = text(
+    """
+    SELECT s.relname, s.indexrelname, s.idx_scan,
+        pg_relation_size(s.indexrelid), i.indisunique OR i.indisprimary
+    FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = current_schema()
+    """
+)
+# The first column of each index, the one a filter can use it by alone
+LEADING_COLUMNS_QUERY = text(
+    """
+    SELECT t.relname, a.attname
+    FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    WHERE n.nspname = current_schema()
+    """
+)
+HAS_STATEMENTS_QUERY = text(
+    "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'"
+)
+STATEMENTS_QUERY = text(
+    """
+    SELECT query, calls, total_exec_time, mean_exec_time
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY total_exec_time DESC
+    LIMIT :top
+    """
+)
+
+# A qualified column compared to a parameter, as SQLAlchemy writes filters
+# and pg_stat_statements normalizes their values: item.owner_id = $1
+FILTER = re.compile(
+    r'"?(\w+)"?\."?(\w+)"?\s*(?:=|<>|!=|<=|>=|<|>|\bIN\b|\bLIKE\b)\s*\(?\$\d+',
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class TableStats:
+    name: str
+    seq_scan: int
+    seq_tup_read: int
+    idx_scan: int
+    live_rows: int
+
+
+@dataclass
+class IndexStats:
+    table: str
+    name: str
+    idx_scan: int
+    size: int
+    # Unique and primary key indexes enforce a constraint even when unused
+    enforces_constraint: bool
+
+
+@dataclass
+class StatementStats:
+    query: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+
+
+def sequentially_scanned(
+    tables: Iterable[TableStats], *, min_rows: int, min_seq_scans: int
+) -> list[TableStats]:
+    """
+    Tables of some size read more often by sequential than by index scans.
+    """
+    found = [
+        table
+        for table in tables
+        if table.live_rows >= min_rows
+        and table.seq_scan >= min_seq_scans
+        and table.seq_scan > table.idx_scan
+    ]
+    return sorted(found, key=lambda table: table.seq_tup_read, reverse=True)
+
+
+def unused_indexes(indexes: Iterable[IndexStats]) -> list[IndexStats]:
+    found = [
+        index
+        for index in indexes
+        if index.idx_scan == 0 and not index.enforces_constraint
+    ]
+    return sorted(found, key=lambda index: index.size, reverse=True)
+
+
+def filtered_columns(query: str) -> set[tuple[str, str]]:
+    """
+    The (table, column) pairs a normalized statement compares to parameters.
+    """
+    return {(table, column) for table, column in FILTER.findall(query)}
+
+
+def unindexed_filters(
+    statements: Iterable[StatementStats], leading_columns: set[tuple[str, str]]
+) -> list[tuple[StatementStats, list[tuple[str, str]]]]:
+    """
+    The statements filtering on columns that no index starts with.
+    """
+    found = []
+    for statement in statements:
+        missing = sorted(filtered_columns(statement.query) - leading_columns)
+        if missing:
+            found.append((statement, missing))
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--top", type=int, default=20, help="statements to look at, by total time"
+    )
+    parser.add_argument("--min-rows", type=int, default=1000)
+    parser.add_argument("--min-seq-scans", type=int, default=50)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        tables = [TableStats(*row) for row in session.execute(TABLES_QUERY)]
+        indexes = [IndexStats(*row) for row in session.execute(INDEXES_QUERY)]
+        leading_columns = {
+            (table, column) for table, column in session.execute(LEADING_COLUMNS_QUERY)
+        }
+        statements = None
+        if session.execute(HAS_STATEMENTS_QUERY).first():
+            statements = [
+                StatementStats(*row)
+                for row in session.execute(STATEMENTS_QUERY, {"top": args.top})
+            ]
+
+    logger.info("Tables read mostly by sequential scans:")
+    for table in sequentially_scanned(
+        tables, min_rows=args.min_rows, min_seq_scans=args.min_seq_scans
+    ):
+        logger.info(
+            "  %-20s %8d seq scans  %8d index scans  %10d rows read  %8d rows",
+            table.name,
+            table.seq_scan,
+            table.idx_scan,
+            table.seq_tup_read,
+            table.live_rows,
+        )
+
+    logger.info("Indexes not used since the statistics were reset:")
+    for index in unused_indexes(indexes):
+        logger.info(
+            "  %-50s on %-16s %8.1f MiB",
+            index.name,
+            index.table,
+            index.size / 2**20,
+        )
+
+    if statements is None:
+        logger.info(
+            "pg_stat_statements is not installed, add it to"
+            " shared_preload_libraries and CREATE EXTENSION pg_stat_statements"
+            " to see which statements miss an index"
+        )
+        return
+    logger.info("Statements filtering on columns no index starts with:")
+    for statement, missing in unindexed_filters(statements, leading_columns):
+        logger.info(
+            "  %8.1f ms total  %6.2f ms mean  %8d calls  %s",
+            statement.total_ms,
+            statement.mean_ms,
+            statement.calls,
+            ", ".join(f"{table}.{column}" for table, column in missing),
+        )
+        logger.info("    %s", " ".join(statement.query.split())[:200])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.hashing import HashingBusy, hashing_busy_handler
+from app.core.security import hash_pool
+from app.core.upstream import close_upstreams, open_upstreams
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,10 +21,23 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Pooled HTTP clients used by the API gateway, one per microservice
+    open_upstreams()
+    try:
+        yield
+    finally:
+        await close_upstreams()
+        hash_pool.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -30,4 +50,16 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+# Compress responses, including proxied ones the services sent uncompressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_level=settings.COMPRESSION_BROTLI_LEVEL,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+)
+
+# Password hashing pool is saturated
+app.add_exception_handler(HashingBusy, hashing_busy_handler)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
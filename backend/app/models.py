@@ -1,6 +1,9 @@
 import uuid
+from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import EmailStr
+from sqlalchemy import JSON, DateTime, Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -43,6 +46,11 @@ class UpdatePassword(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Access tokens issued until then are refused on every worker, set when
+    # the flags they carry change, see crud.reload_revocations
+    tokens_revoked_at: datetime | None = Field(
+        default=None, sa_type=DateTime(timezone=True), index=True
+    )
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
 
 
@@ -53,7 +61,11 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # None with count=none, the planner's estimate with count=estimate
+    count: int | None
+    # Pass as cursor for the next page, None on the last one
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Shared properties
@@ -74,6 +86,9 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    # Listing a user's items in id order, see app.core.pagination
+    __table_args__ = (Index("ix_item_owner_id_id", "owner_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -89,7 +104,9 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Generic message
@@ -101,11 +118,101 @@ class Message(SQLModel):
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+    # Seconds until the access token expires
+    expires_in: int | None = None
+
+
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
-    sub: str | None = None
+    sub: uuid.UUID
+    type: Literal["access"]
+    iat: float
+    is_active: bool
+    is_superuser: bool
+
+
+# Contents of JWT refresh token
+class RefreshTokenPayload(SQLModel):
+    sub: uuid.UUID
+    type: Literal["refresh"]
+    jti: uuid.UUID
+
+
+# The user an access token was issued to, as of when it was issued
+class TokenUser(SQLModel):
+    id: uuid.UUID
+    is_active: bool
+    is_superuser: bool
+    # Of the API key used, None when authenticated with an access token
+    scopes: list[str] | None = None
+
+
+# Database model, each refresh token can be used once
+class RefreshToken(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True))
+    used: bool = False
+
+
+# Database model, a deleted user's access tokens are refused on every worker
+# until they expire, see crud.reload_revocations
+class DeletedUser(SQLModel, table=True):
+    id: uuid.UUID = Field(primary_key=True)
+    deleted_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+
+
+# "read" allows GET, HEAD and OPTIONS requests, "write" the others and
+# "admin" the owner's superuser privileges
+ApiKeyScope = Literal["read", "write", "admin"]
+
+
+# Shared properties
+class ApiKeyBase(SQLModel):
+    name: str = Field(min_length=1, max_length=255)
+    scopes: list[ApiKeyScope] = Field(default=["read"], sa_type=JSON)
+
+
+# Properties to receive on API key creation
+class ApiKeyCreate(ApiKeyBase):
+    pass
+
+
+# Database model, only an HMAC digest of the key is stored
+class ApiKey(ApiKeyBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    # Start of the key, to tell keys apart
+    prefix: str = Field(max_length=16)
+    key_digest: str = Field(max_length=64, unique=True, index=True)
+    created_at: datetime = Field(sa_type=DateTime(timezone=True))
+
+
+# Properties to return via API, id is always required
+class ApiKeyPublic(ApiKeyBase):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    prefix: str
+    created_at: datetime
+
+
+# Returned once on creation, with the key itself
+class ApiKeyCreated(ApiKeyPublic):
+    key: str
+
+
+class ApiKeysPublic(SQLModel):
+    data: list[ApiKeyPublic]
+    count: int
 
 
 class NewPassword(SQLModel):
@@ -139,7 +246,9 @@ class HospitalPublic(HospitalBase):
 
 class HospitalsPublic(SQLModel):
     data: list[HospitalPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Doctor models
@@ -161,6 +270,8 @@ class DoctorUpdate(DoctorBase):
 
 
 class Doctor(DoctorBase, table=True):
+    __table_args__ = (Index("ix_doctor_hospital_id_id", "hospital_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hospital_id: uuid.UUID = Field(
         foreign_key="hospital.id", nullable=False, ondelete="CASCADE"
@@ -177,7 +288,9 @@ class DoctorPublic(DoctorBase):
 
 class DoctorsPublic(SQLModel):
     data: list[DoctorPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Doctor time slot models
@@ -191,6 +304,22 @@ class DoctorTimeSlotCreate(DoctorTimeSlotBase):
 
 
 class DoctorTimeSlot(DoctorTimeSlotBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_doctortimeslot_doctor_id_time_slot_is_available",
+            "doctor_id",
+            "time_slot",
+            "is_available",
+        ),
+        # The slots still open, the ones listed and booked
+        Index(
+            "ix_doctortimeslot_available",
+            "doctor_id",
+            "time_slot",
+            postgresql_where=text("is_available"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     doctor_id: uuid.UUID = Field(
         foreign_key="doctor.id", nullable=False, ondelete="CASCADE"
@@ -223,6 +352,8 @@ class AppointmentUpdate(SQLModel):
 
 
 class Appointment(AppointmentBase, table=True):
+    __table_args__ = (Index("ix_appointment_user_id_id", "user_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -246,7 +377,9 @@ class AppointmentPublic(AppointmentBase):
 
 class AppointmentsPublic(SQLModel):
     data: list[AppointmentPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # User validation request
@@ -255,3 +388,16 @@ class UserValidation(SQLModel):
     id_number: str = Field(max_length=100, alias="idNumber")
     phone: str = Field(max_length=50)
     email: str | None = Field(default=None, max_length=255)
+
+
+# One part of an aggregated gateway response, status is ok, error or timeout
+class AggregatePart(SQLModel):
+    status: str
+    data: Any | None = None
+    error: str | None = None
+
+
+class Dashboard(SQLModel):
+    items: AggregatePart
+    appointments: AggregatePart
+    hospitals: AggregatePart
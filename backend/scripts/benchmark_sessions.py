@@ -0,0 +1,173 @@
+"""
+Compare sync routes on a Session with async routes on an AsyncSession.
+
+    python scripts/benchmark_sessions.py --requests 5000 --concurrency 200
+    python scripts/benchmark_sessions.py --pool-size 100 --query-latency 0.02
+
+Both routes run the items listing queries, a count and a page of items,
+against the database in the settings, served by hypercorn on a local port.
+The sync route runs in AnyIO's threadpool (40 threads by default), the async
+one on the event loop, each with an engine whose pool has --pool-size
+connections. --query-latency adds a pg_sleep to stand in for slower queries.
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import statistics
+import time
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import pool_options
+from app.core.pool import TimedAsyncQueuePool, TimedQueuePool
+from app.models import Item
+
+CLIENT_TIMEOUT = 60.0
+
+logging.basicConfig(format="%(message)s")
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def make_app(pool_size: int, query_latency: float) -> tuple[FastAPI, Any, Any]:
+    # Requests queue for a connection rather than fail, as long as the client
+    options = {
+        **pool_options,
+        "pool_size": pool_size,
+        "max_overflow": 0,
+        "pool_timeout": CLIENT_TIMEOUT,
+    }
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    engine = create_engine(url, poolclass=TimedQueuePool, **options)
+    async_engine = create_async_engine(url, poolclass=TimedAsyncQueuePool, **options)
+    count_statement = select(func.count()).select_from(Item)
+    statement = select(Item).limit(100)
+    sleep = text("SELECT pg_sleep(:seconds)")
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def read_sync() -> int:
+        with Session(engine) as session:
+            if query_latency:
+                session.execute(sleep, {"seconds": query_latency})
+            count = session.exec(count_statement).one()
+            session.exec(statement).all()
+        return count
+
+    @app.get("/async")
+    async def read_async() -> int:
+        async with AsyncSession(async_engine) as session:
+            if query_latency:
+                await session.execute(sleep, {"seconds": query_latency})
+            count = (await session.exec(count_statement)).one()
+            (await session.exec(statement)).all()
+        return count
+
+    return app, engine, async_engine
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def run(
+    url: str, pool: Any, *, requests: int, concurrency: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=CLIENT_TIMEOUT) as client:
+
+        async def call() -> None:
+            nonlocal errors
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    snapshot = pool.snapshot()
+    return {
+        "route": url.rsplit("/", 1)[-1],
+        "requests/s": round(len(latencies) / elapsed),
+        "p50 ms": round(quantiles[49] * 1000, 2) if quantiles else None,
+        "p99 ms": round(quantiles[98] * 1000, 2) if quantiles else None,
+        "pool checkout p99 ms": snapshot["checkout_ms"]["p99"],
+        "pool timeouts": snapshot["timeouts"],
+        "errors": errors,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    app, engine, async_engine = make_app(args.pool_size, args.query_latency)
+    port = free_port()
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    shutdown = asyncio.Event()
+    server = asyncio.ensure_future(
+        serve(app, config, shutdown_trigger=shutdown.wait)  # type: ignore[arg-type]
+    )
+    await asyncio.sleep(0.5)
+
+    logger.info(
+        "%s requests, %s concurrent, pool of %s connections",
+        args.requests,
+        args.concurrency,
+        args.pool_size,
+    )
+    try:
+        for route, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+            url = f"http://127.0.0.1:{port}/{route}"
+            # Warm up, then measure
+            await run(url, pool, requests=100, concurrency=args.concurrency)
+            result = await run(
+                url, pool, requests=args.requests, concurrency=args.concurrency
+            )
+            logger.info("  ".join(f"{key}: {value}" for key, value in result.items()))
+    finally:
+        shutdown.set()
+        await server
+        engine.dispose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument(
+        "--query-latency",
+        type=float,
+        default=0.005,
+        help="seconds of pg_sleep added to each request",
+    )
+    asyncio.run(main(parser.parse_args()))
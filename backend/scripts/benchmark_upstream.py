@@ -0,0 +1,158 @@
+"""
+Compare the gateway's pooled HTTP/1.1 upstream client with HTTP/2 (h2c).
+
+    python scripts/benchmark_upstream.py --requests 5000 --concurrency 200
+    python scripts/benchmark_upstream.py --url http://localhost:8002/health
+
+Without --url a stand-in service is served by hypercorn on a local port,
+it answers both protocols like a service run with SERVICE_HTTP2=true. The
+clients use the gateway's connection pool settings.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import time
+from typing import Any
+
+import httpx
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.upstream import Upstream
+
+# As set for the services in services/shared/server.py
+SERVICE_KEEP_ALIVE_MAX_REQUESTS = 100_000
+
+logging.basicConfig(format="%(message)s")
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def make_stand_in_service(latency: float) -> Any:
+    body = json.dumps({"status": "ok", "service": "benchmark"}).encode()
+
+    async def app(scope: Scope, _receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return
+        if latency:
+            await asyncio.sleep(latency)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def run(
+    url: str, *, http2: bool, requests: int, concurrency: int
+) -> dict[str, Any]:
+    settings.GATEWAY_HTTP2 = http2
+    service = Upstream("benchmark", url)
+    service.open()
+    connections = 0
+
+    async def trace(event_name: str, _info: dict[str, Any]) -> None:
+        nonlocal connections
+        if event_name == "connection.connect_tcp.complete":
+            connections += 1
+
+    latencies: list[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call() -> None:
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                response = await service.client.get(url, extensions={"trace": trace})
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await service.aclose()
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    return {
+        "protocol": "HTTP/2 (h2c)" if http2 else "HTTP/1.1",
+        "requests/s": round(len(latencies) / elapsed),
+        "p50 ms": round(quantiles[49] * 1000, 2) if quantiles else None,
+        "p99 ms": round(quantiles[98] * 1000, 2) if quantiles else None,
+        "connections": connections,
+        "errors": errors,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = args.url
+    server = None
+    shutdown = asyncio.Event()
+    if url is None:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        port = free_port()
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.accesslog = None
+        config.keep_alive_max_requests = SERVICE_KEEP_ALIVE_MAX_REQUESTS
+        app = make_stand_in_service(args.service_latency)
+        server = asyncio.ensure_future(
+            serve(app, config, shutdown_trigger=shutdown.wait)
+        )
+        url = f"http://127.0.0.1:{port}/health"
+        await asyncio.sleep(0.5)
+
+    logger.info(
+        "%s requests, %s concurrent, to %s", args.requests, args.concurrency, url
+    )
+    try:
+        for http2 in (False, True):
+            # Warm up, then measure
+            await run(url, http2=http2, requests=100, concurrency=args.concurrency)
+            result = await run(
+                url,
+                http2=http2,
+                requests=args.requests,
+                concurrency=args.concurrency,
+            )
+            logger.info("  ".join(f"{key}: {value}" for key, value in result.items()))
+    finally:
+        if server is not None:
+            shutdown.set()
+            await server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="service endpoint, default a stand-in")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--service-latency",
+        type=float,
+        default=0.005,
+        help="seconds the stand-in service takes to answer",
+    )
+    asyncio.run(main(parser.parse_args()))
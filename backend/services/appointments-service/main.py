@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy.exc import OperationalError
 
 from routes import router
+from shared.config import settings
+from shared.database import async_engine, engine, replica_router
+from shared.deadline import DeadlineMiddleware, query_canceled_handler
 
 app = FastAPI(title="Appointments Service", version="1.0.0")
 
@@ -14,6 +19,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+)
+
+# Stop work on requests whose caller gave up
+app.add_middleware(DeadlineMiddleware)
+app.add_exception_handler(OperationalError, query_canceled_handler)
+
 app.include_router(router)
 
 
@@ -22,6 +38,15 @@ def health_check():
     return {"status": "ok", "service": "appointments"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "db_pool": engine.pool.snapshot(),
+        "db_async_pool": async_engine.pool.snapshot(),
+        "read_replicas": replica_router.snapshot(),
+    }
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    from shared.server import serve
+    serve(app, port=8001)
@@ -1,10 +1,17 @@
 import uuid
 
+from sqlalchemy.orm import registry
 from sqlmodel import Field, Relationship, SQLModel
 
 
+# Tables are kept in their own registry, apart from the backend's models,
+# so the gateway can also run the service in-process
+class ServiceModel(SQLModel, registry=registry()):
+    pass
+
+
 # Hospital models
-class HospitalBase(SQLModel):
+class HospitalBase(ServiceModel):
     name: str = Field(max_length=255)
     address: str = Field(max_length=255)
 
@@ -22,13 +29,15 @@ class HospitalPublic(HospitalBase):
     id: uuid.UUID
 
 
-class HospitalsPublic(SQLModel):
+class HospitalsPublic(ServiceModel):
     data: list[HospitalPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Doctor models
-class DoctorBase(SQLModel):
+class DoctorBase(ServiceModel):
     name: str = Field(max_length=255)
     specialty: str = Field(max_length=255)
     rating: float = Field(default=0.0, ge=0.0, le=5.0)
@@ -53,13 +62,15 @@ class DoctorPublic(DoctorBase):
     hospital_id: uuid.UUID
 
 
-class DoctorsPublic(SQLModel):
+class DoctorsPublic(ServiceModel):
     data: list[DoctorPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Doctor time slot models
-class DoctorTimeSlotBase(SQLModel):
+class DoctorTimeSlotBase(ServiceModel):
     time_slot: str = Field(max_length=50)
     is_available: bool = Field(default=True)
 
@@ -82,7 +93,7 @@ class DoctorTimeSlotPublic(DoctorTimeSlotBase):
 
 
 # Appointment models
-class AppointmentBase(SQLModel):
+class AppointmentBase(ServiceModel):
     patient_name: str = Field(max_length=255)
     patient_id_number: str = Field(max_length=100)
     patient_phone: str = Field(max_length=50)
@@ -97,7 +108,7 @@ class AppointmentCreate(AppointmentBase):
     user_id: uuid.UUID
 
 
-class AppointmentUpdate(SQLModel):
+class AppointmentUpdate(ServiceModel):
     status: str | None = Field(default=None, max_length=50)
 
 
@@ -120,13 +131,15 @@ class AppointmentPublic(AppointmentBase):
     doctor_id: uuid.UUID
 
 
-class AppointmentsPublic(SQLModel):
+class AppointmentsPublic(ServiceModel):
     data: list[AppointmentPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # User validation request
-class UserValidation(SQLModel):
+class UserValidation(ServiceModel):
     name: str = Field(max_length=255)
     id_number: str = Field(max_length=100, alias="idNumber")
     phone: str = Field(max_length=50)
@@ -134,5 +147,5 @@ class UserValidation(SQLModel):
 
 
 # Generic message
-class Message(SQLModel):
+class Message(ServiceModel):
     message: str
@@ -2,7 +2,8 @@ import uuid
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, func, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models import (
     Appointment,
@@ -22,15 +23,19 @@ from models import (
 
 import sys
 sys.path.append('..')
-from shared.database import get_session
+from shared.database import get_async_session, get_read_session
+from shared.pagination import CountStrategy, fetch_page_async, get_cursor
 
-SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+# Read-only routes, served by a read replica when there is one
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+CursorDep = Annotated[uuid.UUID | None, Depends(get_cursor)]
 
 router = APIRouter(prefix="/api/v1/appointments", tags=["appointments"])
 
 
 @router.post("/validate-user")
-def validate_user(*, user_info: UserValidation) -> Message:
+async def validate_user(*, user_info: UserValidation) -> Message:
     """
     Validate user information before booking.
     """
@@ -48,50 +53,64 @@ def validate_user(*, user_info: UserValidation) -> Message:
 
 
 @router.get("/hospitals", response_model=HospitalsPublic)
-def get_hospitals(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def get_hospitals(
+    session: ReadSessionDep,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
+) -> Any:
     """
-    Get list of all hospitals.
+    Get list of all hospitals, in pages after skip hospitals or a cursor.
     """
-    count_statement = select(func.count()).select_from(Hospital)
-    count = session.exec(count_statement).one()
-    statement = select(Hospital).offset(skip).limit(limit)
-    hospitals = session.exec(statement).all()
-    return HospitalsPublic(data=hospitals, count=count)
+    page = await fetch_page_async(
+        session,
+        select(Hospital),
+        Hospital.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+    )
+    return HospitalsPublic(**page)
 
 
 @router.get("/hospitals/{hospital_id}/doctors", response_model=DoctorsPublic)
-def get_hospital_doctors(
-    session: SessionDep, hospital_id: uuid.UUID, skip: int = 0, limit: int = 100
+async def get_hospital_doctors(
+    session: ReadSessionDep,
+    hospital_id: uuid.UUID,
+    cursor: CursorDep,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
 ) -> Any:
     """
     Get list of doctors for a specific hospital.
     """
-    hospital = session.get(Hospital, hospital_id)
+    hospital = await session.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    count_statement = (
-        select(func.count()).select_from(Doctor).where(Doctor.hospital_id == hospital_id)
+    page = await fetch_page_async(
+        session,
+        select(Doctor).where(Doctor.hospital_id == hospital_id),
+        Doctor.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
     )
-    count = session.exec(count_statement).one()
-    statement = (
-        select(Doctor)
-        .where(Doctor.hospital_id == hospital_id)
-        .offset(skip)
-        .limit(limit)
-    )
-    doctors = session.exec(statement).all()
-    return DoctorsPublic(data=doctors, count=count)
+    return DoctorsPublic(**page)
 
 
 @router.get("/doctors/{doctor_id}/time-slots")
-def get_doctor_time_slots(
-    session: SessionDep, doctor_id: uuid.UUID
+async def get_doctor_time_slots(
+    session: ReadSessionDep, doctor_id: uuid.UUID
 ) -> list[DoctorTimeSlotPublic]:
     """
     Get available time slots for a specific doctor.
     """
-    doctor = session.get(Doctor, doctor_id)
+    doctor = await session.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
@@ -99,22 +118,22 @@ def get_doctor_time_slots(
         DoctorTimeSlot.doctor_id == doctor_id,
         DoctorTimeSlot.is_available == True,  # noqa: E712
     )
-    time_slots = session.exec(statement).all()
+    time_slots = (await session.exec(statement)).all()
     return [DoctorTimeSlotPublic.model_validate(slot) for slot in time_slots]
 
 
 @router.post("/", response_model=AppointmentPublic)
-def create_appointment(
-    *, session: SessionDep, appointment_in: AppointmentCreate
+async def create_appointment(
+    *, session: AsyncSessionDep, appointment_in: AppointmentCreate
 ) -> Any:
     """
     Create a new appointment.
     """
-    hospital = session.get(Hospital, appointment_in.hospital_id)
+    hospital = await session.get(Hospital, appointment_in.hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    doctor = session.get(Doctor, appointment_in.doctor_id)
+    doctor = await session.get(Doctor, appointment_in.doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     if doctor.hospital_id != appointment_in.hospital_id:
@@ -127,7 +146,7 @@ def create_appointment(
         DoctorTimeSlot.time_slot == appointment_in.appointment_time,
         DoctorTimeSlot.is_available == True,  # noqa: E712
     )
-    time_slot = session.exec(time_slot_statement).first()
+    time_slot = (await session.exec(time_slot_statement)).first()
     if not time_slot:
         raise HTTPException(
             status_code=400, detail="Selected time slot is not available"
@@ -139,62 +158,60 @@ def create_appointment(
     time_slot.is_available = False
     session.add(time_slot)
 
-    session.commit()
-    session.refresh(appointment)
+    await session.commit()
+    await session.refresh(appointment)
     return appointment
 
 
 @router.get("/", response_model=AppointmentsPublic)
-def get_appointments(
-    session: SessionDep, user_id: uuid.UUID | None = None, skip: int = 0, limit: int = 100
+async def get_appointments(
+    session: ReadSessionDep,
+    cursor: CursorDep,
+    user_id: uuid.UUID | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
 ) -> Any:
     """
-    Get list of appointments.
+    Get list of appointments, in pages after skip appointments or a cursor.
     """
+    statement = select(Appointment)
     if user_id:
-        count_statement = (
-            select(func.count())
-            .select_from(Appointment)
-            .where(Appointment.user_id == user_id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Appointment)
-            .where(Appointment.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-        )
-    else:
-        count_statement = select(func.count()).select_from(Appointment)
-        count = session.exec(count_statement).one()
-        statement = select(Appointment).offset(skip).limit(limit)
-
-    appointments = session.exec(statement).all()
-    return AppointmentsPublic(data=appointments, count=count)
+        statement = statement.where(Appointment.user_id == user_id)
+    page = await fetch_page_async(
+        session,
+        statement,
+        Appointment.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count=count,
+    )
+    return AppointmentsPublic(**page)
 
 
 @router.get("/{appointment_id}", response_model=AppointmentPublic)
-def get_appointment(session: SessionDep, appointment_id: uuid.UUID) -> Any:
+async def get_appointment(session: ReadSessionDep, appointment_id: uuid.UUID) -> Any:
     """
     Get appointment details by ID.
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
 
 
 @router.put("/{appointment_id}", response_model=AppointmentPublic)
-def update_appointment(
+async def update_appointment(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     appointment_id: uuid.UUID,
     appointment_in: AppointmentUpdate,
 ) -> Any:
     """
     Update an appointment.
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
@@ -203,7 +220,7 @@ def update_appointment(
             DoctorTimeSlot.doctor_id == appointment.doctor_id,
             DoctorTimeSlot.time_slot == appointment.appointment_time,
         )
-        time_slot = session.exec(time_slot_statement).first()
+        time_slot = (await session.exec(time_slot_statement)).first()
         if time_slot:
             time_slot.is_available = True
             session.add(time_slot)
@@ -211,17 +228,17 @@ def update_appointment(
     update_dict = appointment_in.model_dump(exclude_unset=True)
     appointment.sqlmodel_update(update_dict)
     session.add(appointment)
-    session.commit()
-    session.refresh(appointment)
+    await session.commit()
+    await session.refresh(appointment)
     return appointment
 
 
 @router.delete("/{appointment_id}")
-def delete_appointment(session: SessionDep, appointment_id: uuid.UUID) -> Message:
+async def delete_appointment(session: AsyncSessionDep, appointment_id: uuid.UUID) -> Message:
     """
     Delete an appointment.
     """
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
@@ -229,11 +246,11 @@ def delete_appointment(session: SessionDep, appointment_id: uuid.UUID) -> Messag
         DoctorTimeSlot.doctor_id == appointment.doctor_id,
         DoctorTimeSlot.time_slot == appointment.appointment_time,
     )
-    time_slot = session.exec(time_slot_statement).first()
+    time_slot = (await session.exec(time_slot_statement)).first()
     if time_slot:
         time_slot.is_available = True
         session.add(time_slot)
 
-    session.delete(appointment)
-    session.commit()
+    await session.delete(appointment)
+    await session.commit()
     return Message(message="Appointment deleted successfully")
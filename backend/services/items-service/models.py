@@ -1,10 +1,17 @@
 import uuid
 
+from sqlalchemy.orm import registry
 from sqlmodel import Field, SQLModel
 
 
+# Tables are kept in their own registry, apart from the backend's models,
+# so the gateway can also run the service in-process
+class ServiceModel(SQLModel, registry=registry()):
+    pass
+
+
 # Item models
-class ItemBase(SQLModel):
+class ItemBase(ServiceModel):
     title: str = Field(min_length=1, max_length=255)
     description: str | None = Field(default=None, max_length=255)
 
@@ -27,11 +34,13 @@ class ItemPublic(ItemBase):
     owner_id: uuid.UUID
 
 
-class ItemsPublic(SQLModel):
+class ItemsPublic(ServiceModel):
     data: list[ItemPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    has_more: bool = False
 
 
 # Generic message
-class Message(SQLModel):
+class Message(ServiceModel):
     message: str
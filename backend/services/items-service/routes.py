@@ -2,7 +2,8 @@ import uuid
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, func, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models import (
     Item,
@@ -15,96 +16,92 @@ from models import (
 
 import sys
 sys.path.append('..')
-from shared.database import get_session
+from shared.database import get_async_session, get_read_session
+from shared.pagination import CountStrategy, fetch_page_async, get_cursor
 
-SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+# Read-only routes, served by a read replica when there is one
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+CursorDep = Annotated[uuid.UUID | None, Depends(get_cursor)]
 
 router = APIRouter(prefix="/api/v1/items", tags=["items"])
 
 
 @router.get("/", response_model=ItemsPublic)
-def read_items(
-    session: SessionDep, owner_id: uuid.UUID | None = None, skip: int = 0, limit: int = 100
+async def read_items(
+    session: ReadSessionDep,
+    cursor: CursorDep,
+    owner_id: uuid.UUID | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountStrategy = "exact",
 ) -> Any:
     """
-    Retrieve items.
+    Retrieve items, in pages either after skip items or after a cursor.
     """
+    statement = select(Item)
     if owner_id:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == owner_id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-        )
-    else:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-
-    items = session.exec(statement).all()
-    return ItemsPublic(data=items, count=count)
+        statement = statement.where(Item.owner_id == owner_id)
+    page = await fetch_page_async(
+        session, statement, Item.id, skip=skip, limit=limit, cursor=cursor, count=count
+    )
+    return ItemsPublic(**page)
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, id: uuid.UUID) -> Any:
+async def read_item(session: ReadSessionDep, id: uuid.UUID) -> Any:
     """
     Get item by ID.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
 
 
 @router.post("/", response_model=ItemPublic)
-def create_item(*, session: SessionDep, item_in: ItemCreate) -> Any:
+async def create_item(*, session: AsyncSessionDep, item_in: ItemCreate) -> Any:
     """
     Create new item.
     """
     item = Item.model_validate(item_in)
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return item
 
 
 @router.put("/{id}", response_model=ItemPublic)
-def update_item(
+async def update_item(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     id: uuid.UUID,
     item_in: ItemUpdate,
 ) -> Any:
     """
     Update an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     update_dict = item_in.model_dump(exclude_unset=True)
     item.sqlmodel_update(update_dict)
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return item
 
 
 @router.delete("/{id}")
-def delete_item(session: SessionDep, id: uuid.UUID) -> Message:
+async def delete_item(session: AsyncSessionDep, id: uuid.UUID) -> Message:
     """
     Delete an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await session.commit()
     return Message(message="Item deleted successfully")
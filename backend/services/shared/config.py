@@ -19,6 +19,35 @@ class Settings(BaseSettings):
 
     SQLALCHEMY_DATABASE_URI: PostgresDsn | None = None
 
+    # Connection pool per service process, see the backend's settings
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Milliseconds, 0 for none. Requests with a deadline get a shorter one
+    DB_STATEMENT_TIMEOUT: int = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))
+
+    # Comma separated postgresql+psycopg:// URLs of read replicas, read-only
+    # routes use one whose lag is at most DB_REPLICA_MAX_LAG seconds, checked
+    # every DB_REPLICA_LAG_CHECK_INTERVAL seconds. After a write the client
+    # reads from the primary for DB_PRIMARY_PIN_SECONDS, keep that above the
+    # two added up so it reads its own writes
+    DB_REPLICA_URLS: str = os.getenv("DB_REPLICA_URLS", "")
+    DB_REPLICA_MAX_LAG: float = float(os.getenv("DB_REPLICA_MAX_LAG", "2"))
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = float(
+        os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "1")
+    )
+    DB_PRIMARY_PIN_SECONDS: int = int(os.getenv("DB_PRIMARY_PIN_SECONDS", "5"))
+
+    # gzip responses, the gateway passes them through to clients as is
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+
+    # Serve with hypercorn, which also takes HTTP/2 over cleartext (h2c)
+    # from the gateway, instead of uvicorn
+    SERVICE_HTTP2: bool = os.getenv("SERVICE_HTTP2", "false").lower() == "true"
+
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     @classmethod
     def assemble_db_connection(cls, v: str | None, info: ValidationInfo) -> Any:
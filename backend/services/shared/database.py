@@ -1,10 +1,106 @@
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import settings
+from .deadline import check_deadline, remaining_time
+from .pool import TimedAsyncQueuePool, TimedQueuePool
+from .replicas import ReplicaRouter
+
+# Set after a write, reads go to the primary until the time (epoch seconds)
+# it holds. Clients without cookies can send the header on reads instead
+PRIMARY_PIN_COOKIE = "read_primary_until"
+PRIMARY_HEADER = "x-read-primary"
+
+# The sync and the async engine have a pool each, sized the same
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "connect_args": (
+        {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT}"}
+        if settings.DB_STATEMENT_TIMEOUT
+        else {}
+    ),
+}
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), poolclass=TimedQueuePool, **pool_options
+)
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedAsyncQueuePool,
+    **pool_options,
+)
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()],
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL,
+    **pool_options,
+)
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+@event.listens_for(Session, "after_begin")
+def apply_deadline(_session, _transaction, connection):
+    # Don't let queries outlive the caller's deadline, this also runs for an
+    # AsyncSession, whose sync Session does the work
+    remaining = remaining_time()
+    if remaining is None:
+        return
+    check_deadline()
+    connection.execute(
+        text(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+    )
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+def pin_to_primary(response: Response):
+    pin = settings.DB_PRIMARY_PIN_SECONDS
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        str(int(time.time()) + pin),
+        max_age=pin,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+async def get_async_session(response: Response):
+    async with AsyncSession(async_engine) as session:
+        # The replicas may not have this request's writes yet, once committed
+        if replica_router.replicas:
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _session: pin_to_primary(response),
+            )
+        yield session
+
+
+def pinned_to_primary(request: Request):
+    if request.headers.get(PRIMARY_HEADER, "").lower() in ("1", "true"):
+        return True
+    try:
+        until = float(request.cookies.get(PRIMARY_PIN_COOKIE, "0"))
+    except ValueError:
+        return False
+    return time.time() < until
+
+
+async def get_read_session(request: Request):
+    """
+    A session for read-only routes, on a replica when one is fresh enough.
+    """
+    engine = None if pinned_to_primary(request) else await replica_router.pick()
+    async with AsyncSession(engine or async_engine) as session:
+        yield session
@@ -0,0 +1,91 @@
+import json
+import time
+from contextvars import ContextVar
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Seconds left of the caller's time budget, set by the API gateway
+DEADLINE_HEADER = b"x-request-timeout"
+
+# Monotonic time by which the current request must be answered
+request_deadline: ContextVar[float | None] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def remaining_time() -> float | None:
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """
+    Track the deadline the gateway passed on with a request.
+
+    A request whose deadline already passed is answered with 504 right away,
+    nobody is waiting for the result anymore.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        value = dict(scope["headers"]).get(DEADLINE_HEADER)
+        try:
+            budget = float(value) if value is not None else None
+        except ValueError:
+            budget = None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        if budget <= 0:
+            await send_timeout(send)
+            return
+        token = request_deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+
+
+async def send_timeout(send: Send) -> None:
+    body = json.dumps({"detail": "Request deadline exceeded."}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def check_deadline() -> None:
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+
+
+async def query_canceled_handler(
+    _request: Request, exc: OperationalError
+) -> JSONResponse:
+    """
+    Answer 504 for queries Postgres cancelled at the statement timeout.
+    """
+    # 57014 is query_canceled
+    if getattr(exc.orig, "sqlstate", None) != "57014":
+        raise exc
+    return JSONResponse(
+        status_code=504, content={"detail": "Request deadline exceeded."}
+    )
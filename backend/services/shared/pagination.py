@@ -0,0 +1,134 @@
+import base64
+import binascii
+import uuid
+from typing import Literal
+
+from fastapi import HTTPException
+from sqlalchemy import Table, text
+from sqlmodel import func, select
+
+# "exact" counts all pages' rows in the same query as the page, "estimate"
+# takes the planner's row estimate and "none" doesn't count, has_more tells
+# whether there's a next page
+CountStrategy = Literal["exact", "estimate", "none"]
+
+ESTIMATE_FROM_STATS = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+)
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError):
+        raw = b""
+    if len(raw) != 16:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return uuid.UUID(bytes=raw)
+
+
+def get_cursor(cursor: str | None = None):
+    """
+    The next_cursor of the previous page, when paging with cursors.
+    """
+    return None if cursor is None else decode_cursor(cursor)
+
+
+def paginate(statement, key, *, skip, limit, cursor):
+    """
+    A page of the statement's rows in key order, after the cursor if given,
+    else after skip rows. One row more than the limit is fetched, it tells
+    whether there's a next page, see split_page.
+    """
+    statement = statement.order_by(key)
+    if cursor is not None:
+        statement = statement.where(key > cursor)
+    else:
+        statement = statement.offset(skip)
+    return statement.limit(limit + 1)
+
+
+def split_page(rows, limit):
+    """
+    The page and the cursor of the next one, None on the last page.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(page[-1].id)
+
+
+def count_rows(session, statement):
+    query = select(func.count()).select_from(statement.order_by(None).subquery())
+    return session.exec(query).one()
+
+
+def estimate_rows(session, statement):
+    """
+    The planner's estimate of the statement's row count, from
+    pg_class.reltuples for a whole table, else from the plan. Exact off
+    Postgres.
+    """
+    dialect = session.get_bind().dialect
+    if dialect.name != "postgresql":
+        return count_rows(session, statement)
+    froms = statement.get_final_froms()
+    if (
+        statement.whereclause is None
+        and len(froms) == 1
+        and isinstance(froms[0], Table)
+    ):
+        name = dialect.identifier_preparer.format_table(froms[0])
+        estimate = session.execute(ESTIMATE_FROM_STATS, {"table": name}).scalar()
+        # -1 for a table that was never analyzed
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    compiled = statement.compile(dialect=dialect)
+    (plan,) = (
+        session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .one()
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def fetch_page(session, statement, key, *, skip, limit, cursor, count):
+    """
+    A page of the statement's rows, see paginate, with the fields of the
+    *Public list models.
+    """
+    query = paginate(statement, key, skip=skip, limit=limit, cursor=cursor)
+    total = None
+    # After a cursor the query only sees the rows that follow it, and past
+    # the last page there's no row to carry the count, count those apart
+    if count == "exact" and cursor is None:
+        rows = session.execute(query.add_columns(func.count().over())).all()
+        items = [row[0] for row in rows]
+        if rows:
+            total = rows[0][1]
+        elif not skip:
+            total = 0
+    else:
+        items = session.exec(query).all()
+    if total is None and count == "exact":
+        total = count_rows(session, statement)
+    elif count == "estimate":
+        total = estimate_rows(session, statement)
+
+    data, next_cursor = split_page(items, limit)
+    return {
+        "data": data,
+        "count": total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+async def fetch_page_async(session, statement, key, **kwargs):
+    return await session.run_sync(
+        lambda sync_session: fetch_page(sync_session, statement, key, **kwargs)
+    )
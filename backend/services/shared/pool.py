@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts take, waiting for a free
+    connection, opening a new one and the pre-ping included.
+    """
+
+    def __init__(self, *args, window=1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            with self._lock:
+                self.checkouts += 1
+                self.max_wait = max(self.max_wait, wait)
+                self._waits.append(wait)
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+
+        def percentile(p):
+            if not waits:
+                return None
+            index = min(len(waits) - 1, int(len(waits) * p / 100))
+            return round(waits[index] * 1000, 3)
+
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checkout_ms": {
+                "p50": percentile(50),
+                "p99": percentile(99),
+                "max": round(self.max_wait * 1000, 3),
+            },
+        }
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """
+    TimedQueuePool for an async engine.
+    """
@@ -0,0 +1,120 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from .pool import TimedAsyncQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, 0 when the replica has
+# replayed everything it received or isn't a replica at all
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+LAG_CHECK_TIMEOUT = 1.0
+
+
+class ReadReplica:
+    def __init__(self, url, **engine_options):
+        self.url = url
+        self.engine = create_async_engine(
+            url, poolclass=TimedAsyncQueuePool, **engine_options
+        )
+        # Unknown until checked, and no reads go here until then
+        self.lag = None
+        self.checked_at = 0.0
+        self.reads = 0
+        self.failed_checks = 0
+
+    async def _query_lag(self):
+        async with self.engine.connect() as connection:
+            return await connection.scalar(LAG_QUERY)
+
+    async def check_lag(self):
+        try:
+            lag = await asyncio.wait_for(self._query_lag(), LAG_CHECK_TIMEOUT)
+            self.lag = float(lag)
+        except Exception:
+            logger.warning("Lag check of read replica failed", exc_info=True)
+            self.lag = None
+            self.failed_checks += 1
+        self.checked_at = time.monotonic()
+
+    def snapshot(self):
+        return {
+            "host": self.engine.url.host,
+            "lag": self.lag,
+            "reads": self.reads,
+            "failed_checks": self.failed_checks,
+            "pool": self.engine.pool.snapshot(),
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica for a read-only session, in turns.
+
+    A replica whose lag is over max_lag, or couldn't be checked, is skipped,
+    and with none left the read goes to the primary. Lag is checked again
+    every check_interval seconds, by the request that finds it stale.
+    """
+
+    def __init__(self, urls, *, max_lag, check_interval, **engine_options):
+        self.replicas = [ReadReplica(url, **engine_options) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.primary_reads = 0
+        self._checking = False
+        self._turns = itertools.count()
+
+    async def refresh(self):
+        now = time.monotonic()
+        stale = [
+            replica
+            for replica in self.replicas
+            if now - replica.checked_at >= self.check_interval
+        ]
+        # One request checks, the others go on with the lag last seen
+        if not stale or self._checking:
+            return
+        self._checking = True
+        try:
+            await asyncio.gather(*(replica.check_lag() for replica in stale))
+        finally:
+            self._checking = False
+
+    async def pick(self):
+        """
+        The engine to read from, None for the primary.
+        """
+        if self.replicas:
+            await self.refresh()
+        fresh = [
+            replica
+            for replica in self.replicas
+            if replica.lag is not None and replica.lag <= self.max_lag
+        ]
+        if not fresh:
+            self.primary_reads += 1
+            return None
+        replica = fresh[next(self._turns) % len(fresh)]
+        replica.reads += 1
+        return replica.engine
+
+    def snapshot(self):
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": [replica.snapshot() for replica in self.replicas],
+        }
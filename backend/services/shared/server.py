@@ -0,0 +1,29 @@
+import asyncio
+
+from starlette.types import ASGIApp
+
+from .config import settings
+
+
+def serve(app: ASGIApp, port: int) -> None:
+    """
+    Run a service with uvicorn, or with hypercorn when SERVICE_HTTP2 is set.
+
+    Hypercorn accepts both HTTP/1.1 and HTTP/2 over cleartext on the same
+    port, so the gateway can multiplex its calls over a few connections.
+    """
+    if not settings.SERVICE_HTTP2:
+        import uvicorn
+
+        uvicorn.run(app, host="0.0.0.0", port=port)
+        return
+
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"0.0.0.0:{port}"]
+    # The gateway's few multiplexed connections carry every call, and httpx
+    # fails the calls in flight when one is closed after 1000 requests
+    config.keep_alive_max_requests = 100_000
+    asyncio.run(hypercorn_serve(app, config))
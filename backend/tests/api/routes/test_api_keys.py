@@ -0,0 +1,187 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.security import api_key_digest
+from app.models import ApiKey
+
+
+def test_create_api_key(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner"},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["scopes"] == ["read"]
+    assert content["key"].startswith(content["prefix"])
+    db_key = db.get(ApiKey, uuid.UUID(content["id"]))
+    assert db_key
+    assert db_key.key_digest == api_key_digest(content["key"])
+
+
+def test_create_admin_api_key_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner", "scopes": ["read", "admin"]},
+    )
+    assert r.status_code == 403
+
+
+def test_use_api_key(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner"},
+    )
+    headers = {"X-API-Key": r.json()["key"]}
+    hits = crud.api_key_cache.hits
+
+    for _ in range(2):
+        r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["email"] == settings.EMAIL_TEST_USER
+    assert crud.api_key_cache.hits == hits + 1
+
+    r = client.delete(f"{settings.API_V1_STR}/api-keys/{uuid.uuid4()}", headers=headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "The API key doesn't have the write scope"
+
+
+def test_api_key_without_read_scope(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner", "scopes": ["write"]},
+    )
+    headers = {"X-API-Key": r.json()["key"]}
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "The API key doesn't have the read scope"
+
+
+def test_api_key_cant_change_account(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner", "scopes": ["read", "write"]},
+    )
+    headers = {"X-API-Key": r.json()["key"]}
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=headers,
+        json={"email": "attacker@example.com"},
+    )
+    assert r.status_code == 403
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me/password",
+        headers=headers,
+        json={"current_password": "x" * 8, "new_password": "y" * 8},
+    )
+    assert r.status_code == 403
+    r = client.delete(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "This can't be done with an API key"
+
+
+def test_api_key_without_admin_scope(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=superuser_token_headers,
+        json={"name": "partner", "scopes": ["read"]},
+    )
+    headers = {"X-API-Key": r.json()["key"]}
+    r = client.get(f"{settings.API_V1_STR}/utils/metrics/", headers=headers)
+    assert r.status_code == 403
+
+
+def test_revoke_api_key(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner", "scopes": ["read", "write"]},
+    )
+    content = r.json()
+    headers = {"X-API-Key": content["key"]}
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    # An API key can't revoke itself
+    r = client.delete(
+        f"{settings.API_V1_STR}/api-keys/{content['id']}", headers=headers
+    )
+    assert r.status_code == 403
+    r = client.delete(
+        f"{settings.API_V1_STR}/api-keys/{content['id']}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 403
+
+
+def test_read_api_keys(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner"},
+    )
+    r = client.get(
+        f"{settings.API_V1_STR}/api-keys/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["count"] >= 1
+    assert all("key" not in key for key in content["data"])
+    assert all("key_digest" not in key for key in content["data"])
+
+
+def test_read_api_keys_pages(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    for _ in range(3):
+        client.post(
+            f"{settings.API_V1_STR}/api-keys/",
+            headers=normal_user_token_headers,
+            json={"name": "partner"},
+        )
+    url = f"{settings.API_V1_STR}/api-keys/"
+    r = client.get(url, headers=normal_user_token_headers)
+    count = r.json()["count"]
+    ids = []
+    for skip in range(0, count, 2):
+        r = client.get(
+            url, headers=normal_user_token_headers, params={"skip": skip, "limit": 2}
+        )
+        ids += [key["id"] for key in r.json()["data"]]
+    # Pages don't overlap, so each key is listed once
+    assert len(ids) == count
+    assert ids == sorted(ids, key=uuid.UUID)
+
+
+def test_unknown_api_key(client: TestClient) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me", headers={"X-API-Key": "ak_unknown"}
+    )
+    assert r.status_code == 403
@@ -0,0 +1,643 @@
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Generator
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes.gateway import (
+    cancel_on_disconnect,
+    in_flight_reads,
+    response_cache,
+)
+from app.core import upstream
+from app.core.bulkhead import Bulkhead
+from app.core.config import settings
+from app.core.hedging import HedgePolicy
+from app.core.inprocess import load_service_app
+from app.core.upstream import Upstream
+from app.main import app
+from app.models import Doctor, DoctorTimeSlot, Hospital, Item
+from tests.utils.user import create_random_user
+
+
+class FakeStream(httpx.AsyncByteStream):
+    # Unlike plain bytes content, this isn't read eagerly by httpx
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.content), 16 * 1024):
+            yield self.content[start : start + 16 * 1024]
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class BrokenStream(FakeStream):
+    # Drops the connection after the first chunk
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.content[: 16 * 1024]
+        raise httpx.ReadError("Connection reset by peer")
+
+
+class FakeService:
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.payload: bytes | None = None
+        self.status_code = 200
+        self.delay = 0.0
+        self.failing_hosts: set[str] = set()
+        self.host_delays: dict[str, float] = {}
+        self.broken = False
+        self.streams: list[FakeStream] = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        delay = self.host_delays.get(request.url.host, self.delay)
+        if delay:
+            await asyncio.sleep(delay)
+        if request.url.host in self.failing_hosts:
+            return httpx.Response(502, stream=FakeStream(b""))
+        if self.payload is not None:
+            stream = (BrokenStream if self.broken else FakeStream)(self.payload)
+            self.streams.append(stream)
+            return httpx.Response(self.status_code, stream=stream)
+        content = json.dumps({"data": [], "count": 0, "path": request.url.path})
+        return httpx.Response(
+            self.status_code,
+            headers={"content-type": "application/json"},
+            stream=FakeStream(content.encode()),
+        )
+
+
+def install_fake_service(monkeypatch: pytest.MonkeyPatch, name: str) -> FakeService:
+    service = FakeService()
+    fake = Upstream(
+        name,
+        f"http://{name}.test/api/v1/{name}",
+        transport=httpx.MockTransport(service.handler),
+    )
+    monkeypatch.setattr(upstream, name, fake)
+    return service
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache() -> Generator[None, None, None]:
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.fixture
+def items_service(monkeypatch: pytest.MonkeyPatch) -> FakeService:
+    return install_fake_service(monkeypatch, "items")
+
+
+@pytest.fixture
+def appointments_service(monkeypatch: pytest.MonkeyPatch) -> FakeService:
+    return install_fake_service(monkeypatch, "appointments")
+
+
+def test_gateway_forwards_to_upstream(
+    client: TestClient, items_service: FakeService
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/items/", params={"skip": 10})
+    assert r.status_code == 200
+    assert r.json()["path"] == "/api/v1/items/"
+    assert len(items_service.requests) == 1
+    forwarded = items_service.requests[0]
+    assert forwarded.url.params["skip"] == "10"
+    assert forwarded.headers["host"] == "items.test"
+
+
+def test_gateway_reuses_upstream_client(
+    client: TestClient, items_service: FakeService
+) -> None:
+    pooled = upstream.items.client
+    for _ in range(3):
+        r = client.get(f"{settings.API_V1_STR}/items/")
+        assert r.status_code == 200
+    assert upstream.items.client is pooled
+    assert not pooled.is_closed
+    assert len(items_service.requests) == 3
+
+
+def test_upstream_clients_follow_app_lifespan() -> None:
+    with TestClient(app):
+        clients = [service.client for service in upstream.upstreams.values()]
+        assert all(not c.is_closed for c in clients)
+    assert all(c.is_closed for c in clients)
+
+
+def install_in_process_service(monkeypatch: pytest.MonkeyPatch, name: str) -> None:
+    transport = httpx.ASGITransport(app=load_service_app(name))
+    base_url = getattr(settings, f"{name.upper()}_SERVICE_URL")
+    monkeypatch.setattr(upstream, name, Upstream(name, base_url, transport))
+
+
+def test_gateway_dispatches_in_process(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    install_in_process_service(monkeypatch, "items")
+    owner_id = uuid.uuid4()
+    r = client.get(f"{settings.API_V1_STR}/items/", params={"owner_id": owner_id})
+    assert r.status_code == 200
+    assert r.json() == {"data": [], "count": 0, "next_cursor": None, "has_more": False}
+
+
+def test_gateway_writes_items_in_process(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    install_in_process_service(monkeypatch, "items")
+    owner = create_random_user(db)
+    url = f"{settings.API_V1_STR}/items/"
+    r = client.post(url, json={"title": "Foo", "owner_id": str(owner.id)})
+    assert r.status_code == 200
+    item_id = r.json()["id"]
+    assert r.json()["owner_id"] == str(owner.id)
+
+    r = client.put(f"{url}{item_id}", json={"title": "Bar"})
+    assert r.status_code == 200
+    assert r.json()["title"] == "Bar"
+    r = client.get(f"{url}{item_id}")
+    assert r.json()["title"] == "Bar"
+
+    r = client.delete(f"{url}{item_id}")
+    assert r.status_code == 200
+    assert client.get(f"{url}{item_id}").status_code == 404
+    assert db.get(Item, uuid.UUID(item_id)) is None
+
+
+def test_gateway_books_appointments_in_process(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    install_in_process_service(monkeypatch, "appointments")
+    patient = create_random_user(db)
+    hospital = Hospital(name="General", address="1 Main St")
+    doctor = Doctor(name="Dr. Who", specialty="Cardiology", hospital=hospital)
+    slot = DoctorTimeSlot(time_slot="09:00 AM", doctor=doctor)
+    db.add_all([hospital, doctor, slot])
+    db.commit()
+    url = f"{settings.API_V1_STR}/appointments/"
+    booking = {
+        "patient_name": "Jane Doe",
+        "patient_id_number": "X1234567",
+        "patient_phone": "555-0100",
+        "appointment_time": "09:00 AM",
+        "hospital_id": str(hospital.id),
+        "doctor_id": str(doctor.id),
+        "user_id": str(patient.id),
+    }
+    try:
+        r = client.post(url, json=booking)
+        assert r.status_code == 200
+        appointment_id = r.json()["id"]
+        assert r.json()["status"] == "pending"
+        db.refresh(slot)
+        assert not slot.is_available
+        # The slot is taken now
+        r = client.post(url, json=booking)
+        assert r.status_code == 400
+        assert r.json()["detail"] == "Selected time slot is not available"
+
+        r = client.put(f"{url}{appointment_id}", json={"status": "cancelled"})
+        assert r.status_code == 200
+        assert r.json()["status"] == "cancelled"
+        db.refresh(slot)
+        assert slot.is_available
+
+        r = client.delete(f"{url}{appointment_id}")
+        assert r.status_code == 200
+        assert client.get(f"{url}{appointment_id}").status_code == 404
+    finally:
+        db.delete(hospital)
+        db.commit()
+
+
+def test_in_process_services_dir_missing(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_SERVICES_DIR", str(tmp_path))
+    with pytest.raises(RuntimeError) as excinfo:
+        load_service_app("items")
+    message = str(excinfo.value)
+    assert str(tmp_path / "items-service") in message
+    assert "GATEWAY_SERVICES_DIR" in message
+
+
+def install_replicated_service(
+    monkeypatch: pytest.MonkeyPatch, name: str, replicas: int
+) -> FakeService:
+    service = FakeService()
+    fake = Upstream(
+        name,
+        [f"http://{name}-{i}.test/api/v1/{name}" for i in range(replicas)],
+        transport=httpx.MockTransport(service.handler),
+    )
+    monkeypatch.setattr(upstream, name, fake)
+    return service
+
+
+def test_gateway_ejects_failing_replica(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_EJECT_CONSECUTIVE_FAILURES", 2)
+    service = install_replicated_service(monkeypatch, "items", replicas=2)
+    service.failing_hosts.add("items-0.test")
+    url = f"{settings.API_V1_STR}/items/"
+    statuses = [client.get(url).status_code for _ in range(8)]
+    hosts = [request.url.host for request in service.requests]
+    assert hosts.count("items-0.test") == 2
+    assert statuses.count(200) == 6
+    assert upstream.items.balancer.replicas[0].ejected
+
+
+def test_gateway_keeps_user_on_one_replica(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        settings, "GATEWAY_LOAD_BALANCING_OVERRIDES", {"items": "consistent_hash"}
+    )
+    service = install_replicated_service(monkeypatch, "items", replicas=3)
+    owners = [str(uuid.uuid4()) for _ in range(10)]
+    for owner_id in owners * 2:
+        client.get(f"{settings.API_V1_STR}/items/", params={"owner_id": owner_id})
+    hosts: dict[str, set[str]] = {}
+    for request in service.requests:
+        hosts.setdefault(request.url.params["owner_id"], set()).add(request.url.host)
+    assert all(len(replicas) == 1 for replicas in hosts.values())
+
+
+def test_gateway_hedges_slow_reads(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_HEDGE_ROUTES", ["items:"])
+    service = install_replicated_service(monkeypatch, "items", replicas=2)
+    service.host_delays["items-0.test"] = 1.0
+    hedging = HedgePolicy(min_samples=1, budget_ratio=1.0)
+    hedging.observe(0.02)
+    upstream.items.hedging = hedging
+    r = client.get(f"{settings.API_V1_STR}/items/")
+    assert r.status_code == 200
+    assert [request.url.host for request in service.requests] == [
+        "items-0.test",
+        "items-1.test",
+    ]
+    assert hedging.hedges == 1
+    assert hedging.wins == 1
+
+
+def test_gateway_hedging_respects_budget(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_HEDGE_ROUTES", ["items:"])
+    service = install_replicated_service(monkeypatch, "items", replicas=2)
+    service.delay = 0.05
+    # Always hedge, past the fastest response seen
+    hedging = HedgePolicy(percentile=1, min_samples=1, min_delay=0.0, budget_ratio=0.5)
+    hedging.observe(0.001)
+    upstream.items.hedging = hedging
+    for _ in range(4):
+        client.get(f"{settings.API_V1_STR}/items/")
+    assert hedging.hedges == 2
+    assert hedging.over_budget >= 2
+    assert len(service.requests) == 6
+
+
+def test_gateway_streams_request_body(
+    client: TestClient, items_service: FakeService
+) -> None:
+    data = {"title": "Foo", "description": "x" * 200_000}
+    r = client.post(f"{settings.API_V1_STR}/items/", json=data)
+    assert r.status_code == 200
+    forwarded = items_service.requests[0]
+    assert forwarded.read() == r.request.content
+    assert forwarded.headers["content-length"] == str(len(r.request.content))
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_gateway_proxies_large_response(
+    client: TestClient,
+    items_service: FakeService,
+    monkeypatch: pytest.MonkeyPatch,
+    stream: bool,
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_STREAMING", stream)
+    items_service.payload = bytes(range(256)) * 4096
+    r = client.get(f"{settings.API_V1_STR}/items/")
+    assert r.status_code == 200
+    assert r.content == items_service.payload
+
+
+@pytest.mark.anyio
+async def test_gateway_closes_broken_upstream_stream(
+    items_service: FakeService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_STREAMING", True)
+    items_service.payload = bytes(range(256)) * 4096
+    items_service.broken = True
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        with pytest.raises(httpx.ReadError):
+            await ac.get(f"{settings.API_V1_STR}/items/")
+    (stream,) = items_service.streams
+    assert stream.closed
+    # The slot and the outstanding count are given back with the response
+    assert upstream.items.bulkhead.snapshot()["active"] == 0
+    assert upstream.items.balancer.replicas[0].outstanding == 0
+
+
+def test_gateway_caches_catalog_reads(
+    client: TestClient, appointments_service: FakeService
+) -> None:
+    url = f"{settings.API_V1_STR}/appointments/hospitals"
+    r = client.get(url, params={"limit": 5, "skip": 0})
+    assert r.headers["x-cache"] == "MISS"
+    r = client.get(url, params={"skip": 0, "limit": 5})
+    assert r.headers["x-cache"] == "HIT"
+    assert r.json()["path"] == "/api/v1/appointments/hospitals"
+    assert len(appointments_service.requests) == 1
+    # Buffered reads are not compressed by the service, only by the gateway
+    assert appointments_service.requests[0].headers["accept-encoding"] == "identity"
+
+    client.get(url, params={"limit": 10})
+    assert len(appointments_service.requests) == 2
+
+
+def test_gateway_pinned_reads_skip_cache(
+    client: TestClient, appointments_service: FakeService
+) -> None:
+    url = f"{settings.API_V1_STR}/appointments/hospitals"
+    client.get(url)
+    pin = {"X-Read-Primary": "1"}
+    r = client.get(url, headers=pin)
+    assert "x-cache" not in r.headers
+    assert len(appointments_service.requests) == 2
+    assert appointments_service.requests[1].headers["x-read-primary"] == "1"
+
+
+@pytest.mark.anyio
+async def test_gateway_pinned_reads_are_not_coalesced(
+    appointments_service: FakeService,
+) -> None:
+    appointments_service.delay = 0.05
+    url = f"{settings.API_V1_STR}/appointments/doctors/{uuid.uuid4()}/time-slots"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        until = str(int(time.time()) + 60)
+        ac.cookies.set("read_primary_until", until)
+        responses = await asyncio.gather(*(ac.get(url) for _ in range(3)))
+    assert all(r.status_code == 200 for r in responses)
+    assert len(appointments_service.requests) == 3
+
+
+def test_gateway_does_not_cache_other_reads(
+    client: TestClient, appointments_service: FakeService
+) -> None:
+    url = f"{settings.API_V1_STR}/appointments/"
+    client.get(url)
+    r = client.get(url)
+    assert "x-cache" not in r.headers
+    assert len(appointments_service.requests) == 2
+
+
+def test_gateway_write_invalidates_service_cache(
+    client: TestClient, appointments_service: FakeService
+) -> None:
+    url = f"{settings.API_V1_STR}/appointments/hospitals"
+    client.get(url)
+    client.post(f"{settings.API_V1_STR}/appointments/", json={})
+    r = client.get(url)
+    assert r.headers["x-cache"] == "MISS"
+    assert len(appointments_service.requests) == 3
+
+
+@pytest.mark.usefixtures("appointments_service")
+def test_gateway_metrics(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/appointments/hospitals"
+    client.get(url)
+    client.get(url)
+    r = client.get(
+        f"{settings.API_V1_STR}/gateway/metrics", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    cache = r.json()["cache"]
+    assert cache["hits"] >= 1
+    assert cache["misses"] >= 1
+    assert cache["size"] == 1
+    assert r.json()["breakers"]["appointments"]["state"] == "closed"
+    assert r.json()["bulkheads"]["appointments"]["active"] == 0
+    replicas = r.json()["balancers"]["appointments"]["replicas"]
+    assert replicas[0]["outstanding"] == 0
+
+
+def test_gateway_metrics_requires_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/gateway/metrics", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
+def test_gateway_fails_fast_when_circuit_open(
+    client: TestClient, items_service: FakeService
+) -> None:
+    items_service.status_code = 500
+    url = f"{settings.API_V1_STR}/items/"
+    for _ in range(settings.GATEWAY_BREAKER_MIN_CALLS):
+        r = client.get(url)
+        assert r.status_code == 500
+    assert upstream.items.breaker.state == "open"
+
+    r = client.get(url)
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) >= 1
+    assert len(items_service.requests) == settings.GATEWAY_BREAKER_MIN_CALLS
+
+
+@pytest.mark.anyio
+async def test_gateway_sheds_load_over_bulkhead(
+    items_service: FakeService, appointments_service: FakeService
+) -> None:
+    items_service.delay = 0.1
+    upstream.items.bulkhead = Bulkhead(max_concurrent=1, max_queue=1, max_wait=1.0)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        responses = await asyncio.gather(
+            *(ac.get(f"{settings.API_V1_STR}/items/") for _ in range(3)),
+            ac.get(f"{settings.API_V1_STR}/appointments/"),
+        )
+
+    statuses = sorted(r.status_code for r in responses[:3])
+    assert statuses == [200, 200, 503]
+    shed = next(r for r in responses if r.status_code == 503)
+    assert int(shed.headers["retry-after"]) >= 1
+    # A busy items service doesn't hold up the appointments service
+    assert responses[3].status_code == 200
+    assert len(appointments_service.requests) == 1
+    assert len(items_service.requests) == 2
+    snapshot = upstream.items.bulkhead.snapshot()
+    assert snapshot["rejected"]["queue_full"] == 1
+    assert snapshot["queued_peak"] == 1
+    assert snapshot["active"] == 0
+
+
+def test_gateway_propagates_deadline(
+    client: TestClient,
+    items_service: FakeService,
+    appointments_service: FakeService,
+) -> None:
+    client.get(f"{settings.API_V1_STR}/items/")
+    remaining = float(items_service.requests[0].headers["x-request-timeout"])
+    assert 0 < remaining <= settings.GATEWAY_TIMEOUT
+
+    client.get(f"{settings.API_V1_STR}/appointments/hospitals")
+    remaining = float(appointments_service.requests[0].headers["x-request-timeout"])
+    assert remaining <= settings.GATEWAY_ROUTE_TIMEOUTS["appointments:/hospitals*"]
+
+
+def test_gateway_honours_caller_deadline(
+    client: TestClient, items_service: FakeService
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    client.get(url, headers={"X-Request-Timeout": "1.5"})
+    assert float(items_service.requests[0].headers["x-request-timeout"]) <= 1.5
+
+    r = client.get(url, headers={"X-Request-Timeout": "0"})
+    assert r.status_code == 504
+    assert len(items_service.requests) == 1
+
+
+@pytest.mark.anyio
+async def test_cancel_on_disconnect() -> None:
+    async def receive() -> dict[str, str]:
+        return {"type": "http.disconnect"}
+
+    request = Request({"type": "http", "headers": []}, receive)
+    call = asyncio.ensure_future(asyncio.sleep(5))
+    with pytest.raises(HTTPException) as e:
+        await cancel_on_disconnect(request, call)
+    assert e.value.status_code == 499
+    await asyncio.sleep(0)
+    assert call.cancelled()
+
+
+@pytest.mark.anyio
+async def test_gateway_coalesces_identical_reads(
+    appointments_service: FakeService,
+) -> None:
+    appointments_service.delay = 0.05
+    url = f"{settings.API_V1_STR}/appointments/doctors/{uuid.uuid4()}/time-slots"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+
+        def get(token: str) -> Awaitable[httpx.Response]:
+            return ac.get(url, headers={"Authorization": f"Bearer {token}"})
+
+        responses = await asyncio.gather(*(get("a") for _ in range(5)), get("b"))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses}) == 1
+    # One upstream call per auth scope
+    assert len(appointments_service.requests) == 2
+    assert in_flight_reads.shared >= 4
+    assert len(in_flight_reads) == 0
+
+
+@pytest.mark.anyio
+async def test_gateway_coalesces_reads_per_api_key(
+    appointments_service: FakeService,
+) -> None:
+    appointments_service.delay = 0.05
+    url = f"{settings.API_V1_STR}/appointments/doctors/{uuid.uuid4()}/time-slots"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+
+        def get(api_key: str) -> Awaitable[httpx.Response]:
+            return ac.get(url, headers={"X-API-Key": api_key})
+
+        responses = await asyncio.gather(*(get(key) for key in ("a", "a", "b")))
+
+    assert all(r.status_code == 200 for r in responses)
+    # Callers with different API keys don't share a response
+    assert len(appointments_service.requests) == 2
+    keys = {request.headers["x-api-key"] for request in appointments_service.requests}
+    assert keys == {"a", "b"}
+
+
+def test_dashboard_aggregates_services(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    items_service: FakeService,
+    appointments_service: FakeService,
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/dashboard", headers=normal_user_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["items"]["status"] == "ok"
+    assert content["items"]["data"]["path"] == "/api/v1/items/"
+    assert content["appointments"]["data"]["path"] == "/api/v1/appointments/"
+    assert content["hospitals"]["data"]["path"] == "/api/v1/appointments/hospitals"
+
+    me = client.get(
+        f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers
+    )
+    user_id = me.json()["id"]
+    assert items_service.requests[0].url.params["owner_id"] == user_id
+    user_ids = [req.url.params.get("user_id") for req in appointments_service.requests]
+    assert user_id in user_ids
+
+
+def test_dashboard_pinned_reads_primary(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    items_service: FakeService,
+    appointments_service: FakeService,
+) -> None:
+    url = f"{settings.API_V1_STR}/dashboard"
+    client.get(url, headers=normal_user_token_headers)
+    r = client.get(url, headers={**normal_user_token_headers, "X-Read-Primary": "1"})
+    assert r.status_code == 200
+    # The hospitals part isn't served from the cache either
+    assert len(appointments_service.requests) == 4
+    pinned = appointments_service.requests[2:] + items_service.requests[1:]
+    assert all(req.headers["x-read-primary"] == "1" for req in pinned)
+
+
+def test_dashboard_reports_failed_parts(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    items_service: FakeService,
+    appointments_service: FakeService,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "GATEWAY_AGGREGATE_PART_TIMEOUT", 0.05)
+    items_service.status_code = 500
+    appointments_service.delay = 0.5
+    r = client.get(
+        f"{settings.API_V1_STR}/dashboard", headers=normal_user_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["items"]["status"] == "error"
+    assert content["items"]["data"] is None
+    assert content["appointments"]["status"] == "timeout"
+    assert content["hospitals"]["status"] == "timeout"
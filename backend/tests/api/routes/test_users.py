@@ -1,13 +1,17 @@
+import time
 import uuid
 from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app import crud
 from app.core.config import settings
+from app.core.revocation import RevocationList
 from app.core.security import verify_password
 from app.models import User, UserCreate
+from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -168,6 +172,100 @@ def test_retrieve_users(
         assert "email" in item
 
 
+def test_retrieve_users_by_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"limit": 10_000},
+    )
+    all_ids = [user["id"] for user in r.json()["data"]]
+    assert all_ids == sorted(all_ids)
+
+    ids: list[str] = []
+    cursor = None
+    while True:
+        params: dict[str, str | int] = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get(
+            f"{settings.API_V1_STR}/users/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert r.status_code == 200
+        page = r.json()
+        ids += [user["id"] for user in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == all_ids
+
+
+def test_retrieve_users_count_strategies(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+    url = f"{settings.API_V1_STR}/users/"
+
+    r = client.get(url, headers=superuser_token_headers, params={"limit": 2})
+    first = r.json()
+    total = first["count"]
+    assert total >= 3
+    assert first["has_more"]
+
+    # Counted apart after a cursor or past the last page
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": first["next_cursor"]},
+    )
+    assert r.json()["count"] == total
+    r = client.get(url, headers=superuser_token_headers, params={"skip": total})
+    assert r.json() == {
+        "data": [],
+        "count": total,
+        "next_cursor": None,
+        "has_more": False,
+    }
+
+    r = client.get(
+        url, headers=superuser_token_headers, params={"limit": 2, "count": "none"}
+    )
+    page = r.json()
+    assert page["count"] is None
+    assert page["has_more"]
+    assert page["data"] == first["data"]
+
+    # As current as the last ANALYZE on Postgres, see test_pagination
+    r = client.get(url, headers=superuser_token_headers, params={"count": "estimate"})
+    estimate = r.json()["count"]
+    assert isinstance(estimate, int)
+    assert estimate >= 0
+
+    r = client.get(url, headers=superuser_token_headers, params={"count": "all"})
+    assert r.status_code == 422
+
+
+def test_retrieve_users_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"cursor": "not a cursor"},
+    )
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Invalid cursor"}
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -230,6 +328,31 @@ def test_update_password_me(
     assert verify_password(settings.FIRST_SUPERUSER_PASSWORD, user_db.hashed_password)
 
 
+def test_update_password_me_revokes_refresh_tokens(
+    client: TestClient, db: Session
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    crud.create_user(session=db, user_create=UserCreate(email=email, password=password))
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    )
+    tokens = r.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me/password",
+        headers=headers,
+        json={"current_password": password, "new_password": random_lower_string()},
+    )
+    assert r.status_code == 200
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 403
+
+
 def test_update_password_me_incorrect_password(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -444,6 +567,34 @@ def test_delete_user_super_user(
     assert result is None
 
 
+def test_delete_user_revokes_tokens_on_other_workers(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=email, password=password)
+    )
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    r = client.delete(
+        f"{settings.API_V1_STR}/users/{user.id}", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+
+    # A worker that didn't see the deletion learns of it on its next reload
+    other_worker = RevocationList(
+        reload_interval=settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+        token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    monkeypatch.setattr(crud, "revocations", other_worker)
+    r = client.post(f"{settings.API_V1_STR}/login/test-token", headers=headers)
+    assert r.status_code == 403
+    assert other_worker.is_revoked(str(user.id), time.time() - 1)
+
+
 def test_delete_user_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -484,3 +635,112 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+def test_current_user_is_cached(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=username, password=password)
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    crud.invalidate_cached_user(user.id)
+    hits = crud.user_cache.hits
+
+    for _ in range(3):
+        r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["email"] == username
+    assert crud.user_cache.hits == hits + 2
+
+
+def test_update_user_invalidates_cached_user(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=username, password=password)
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Inactive user"
+
+
+def test_demoted_superuser_token_is_revoked(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=username, password=password, is_superuser=True),
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    r = client.get(f"{settings.API_V1_STR}/utils/metrics/", headers=headers)
+    assert r.status_code == 200
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_superuser": False},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/utils/metrics/", headers=headers)
+    assert r.status_code == 403
+
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["is_superuser"] is False
+
+
+def test_demoted_superuser_token_is_revoked_on_other_workers(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=username, password=password, is_superuser=True),
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_superuser": False},
+    )
+    assert r.status_code == 200
+
+    # A worker that didn't see the demotion learns of it on its next reload
+    other_worker = RevocationList(
+        reload_interval=settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+        token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    monkeypatch.setattr(crud, "revocations", other_worker)
+    r = client.get(f"{settings.API_V1_STR}/utils/metrics/", headers=headers)
+    assert r.status_code == 403
+    assert other_worker.is_revoked(str(user.id), time.time() - 1)
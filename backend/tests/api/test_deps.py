@@ -0,0 +1,68 @@
+from collections.abc import Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.api.deps import AsyncCurrentTokenUser
+from app.core.config import settings
+from app.core.revocation import RevocationList
+
+app = FastAPI()
+
+
+@app.get("/me")
+async def read_me(current_user: AsyncCurrentTokenUser) -> dict[str, str]:
+    return {"id": str(current_user.id)}
+
+
+@pytest.fixture(scope="module")
+def async_app_client() -> Generator[TestClient, None, None]:
+    with TestClient(app) as c:
+        yield c
+
+
+def test_async_token_user(
+    client: TestClient,
+    async_app_client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    user_id = client.get(
+        f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers
+    ).json()["id"]
+    # Reloaded through the async session on first use
+    revocations = RevocationList(
+        reload_interval=settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+        token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    monkeypatch.setattr(crud, "revocations", revocations)
+    r = async_app_client.get("/me", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert r.json() == {"id": user_id}
+    assert revocations.reloads == 1
+
+
+def test_async_token_user_api_key(
+    client: TestClient,
+    async_app_client: TestClient,
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/api-keys/",
+        headers=normal_user_token_headers,
+        json={"name": "partner"},
+    )
+    user_id = r.json()["user_id"]
+    # Not cached yet, so looked up through the async session
+    r = async_app_client.get("/me", headers={"X-API-Key": r.json()["key"]})
+    assert r.status_code == 200
+    assert r.json() == {"id": user_id}
+    r = async_app_client.get("/me", headers={"X-API-Key": "unknown"})
+    assert r.status_code == 403
+
+
+def test_async_token_user_not_authenticated(async_app_client: TestClient) -> None:
+    r = async_app_client.get("/me")
+    assert r.status_code == 401
@@ -6,6 +6,7 @@ from sqlmodel import Session, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.security import login_throttle
 from app.main import app
 from app.models import Item, User
 from tests.utils.user import authentication_token_from_email
@@ -24,6 +25,12 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def clear_login_throttle() -> None:
+    # Failed logins of earlier runs are still in the window
+    login_throttle.clear()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.balancer import LoadBalancer
+
+URLS = ["http://a.test", "http://b.test", "http://c.test"]
+
+
+def test_least_outstanding_picks_idlest_replica() -> None:
+    balancer = LoadBalancer(URLS, strategy="least_outstanding")
+    a, b, c = balancer.replicas
+    a.outstanding = 3
+    b.outstanding = 1
+    c.outstanding = 2
+    assert balancer.pick() is b
+    b.outstanding = 2
+    c.requests = 1
+    # Ties go to the replica that has served fewer calls
+    assert balancer.pick() is b
+
+
+def test_consistent_hash_is_sticky() -> None:
+    balancer = LoadBalancer(URLS, strategy="consistent_hash")
+    keys = [f"user-{i}" for i in range(200)]
+    picks = {key: balancer.pick(key) for key in keys}
+    assert all(balancer.pick(key) is picks[key] for key in keys)
+    # Keys are spread over all replicas
+    assert set(picks.values()) == set(balancer.replicas)
+
+
+def test_consistent_hash_moves_only_keys_of_ejected_replica() -> None:
+    balancer = LoadBalancer(URLS, strategy="consistent_hash", eject_after=1)
+    keys = [f"user-{i}" for i in range(200)]
+    before = {key: balancer.pick(key) for key in keys}
+    ejected = balancer.replicas[0]
+    balancer.record(ejected, success=False)
+    assert ejected.ejected
+    for key in keys:
+        replica = balancer.pick(key)
+        assert replica is not ejected
+        if before[key] is not ejected:
+            assert replica is before[key]
+
+
+def test_round_robin_takes_turns() -> None:
+    balancer = LoadBalancer(URLS, strategy="round_robin")
+    assert [balancer.pick().base_url for _ in range(4)] == [*URLS, URLS[0]]
+
+
+def test_replica_ejected_after_consecutive_failures() -> None:
+    balancer = LoadBalancer(URLS, eject_after=2, eject_seconds=60)
+    replica = balancer.replicas[0]
+    balancer.record(replica, success=False)
+    balancer.record(replica, success=True)
+    balancer.record(replica, success=False)
+    assert not replica.ejected
+    balancer.record(replica, success=False)
+    assert replica.ejected
+    assert replica.times_ejected == 1
+    assert replica not in balancer.healthy()
+
+
+def test_never_ejects_every_replica() -> None:
+    balancer = LoadBalancer(URLS[:1], eject_after=1, eject_seconds=60)
+    replica = balancer.replicas[0]
+    balancer.record(replica, success=False)
+    assert replica.ejected
+    assert balancer.pick() is replica
+
+
+def test_balancer_needs_a_replica() -> None:
+    with pytest.raises(ValueError):
+        LoadBalancer([])
@@ -0,0 +1,68 @@
+from app.core.breaker import CircuitBreaker
+
+
+def make_breaker(**kwargs: float) -> CircuitBreaker:
+    options = {
+        "window": 4,
+        "min_calls": 4,
+        "error_rate": 0.5,
+        "slow_call_seconds": 1.0,
+        "slow_call_rate": 0.75,
+        "open_seconds": 60.0,
+        "half_open_probes": 1,
+    }
+    options.update(kwargs)
+    return CircuitBreaker(**options)  # type: ignore[arg-type]
+
+
+def test_breaker_opens_on_error_rate() -> None:
+    breaker = make_breaker()
+    for success in (True, True, False):
+        assert breaker.allow_request()
+        breaker.record(success=success, duration=0.01)
+    assert breaker.state == "closed"
+    breaker.record(success=False, duration=0.01)
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+    assert breaker.retry_after() > 0
+
+
+def test_breaker_opens_on_slow_calls() -> None:
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(success=True, duration=2.0)
+    breaker.record(success=True, duration=0.01)
+    assert breaker.state == "open"
+
+
+def test_breaker_half_open_probe_closes() -> None:
+    breaker = make_breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(success=False, duration=0.01)
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record(success=True, duration=0.01)
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_breaker_half_open_probe_failure_reopens() -> None:
+    breaker = make_breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(success=False, duration=0.01)
+    assert breaker.allow_request()
+    breaker.record(success=False, duration=0.01)
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+
+def test_breaker_release_frees_probe() -> None:
+    breaker = make_breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(success=False, duration=0.01)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.core.bulkhead import Bulkhead, BulkheadFull
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_bulkhead_limits_concurrency() -> None:
+    bulkhead = Bulkhead(max_concurrent=2, max_queue=1, max_wait=1.0)
+    await bulkhead.acquire()
+    await bulkhead.acquire()
+    waiting = asyncio.ensure_future(bulkhead.acquire())
+    await asyncio.sleep(0)
+    assert bulkhead.queued == 1
+    assert not waiting.done()
+
+    bulkhead.release()
+    await waiting
+    assert bulkhead.active == 2
+    assert bulkhead.queued == 0
+    assert bulkhead.admitted == 3
+
+
+@pytest.mark.anyio
+async def test_bulkhead_sheds_when_queue_full() -> None:
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=0, max_wait=1.0)
+    await bulkhead.acquire()
+    with pytest.raises(BulkheadFull) as e:
+        await bulkhead.acquire()
+    assert e.value.reason == "queue_full"
+    assert bulkhead.rejected["queue_full"] == 1
+
+
+@pytest.mark.anyio
+async def test_bulkhead_sheds_after_max_wait() -> None:
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=5, max_wait=0.01)
+    await bulkhead.acquire()
+    with pytest.raises(BulkheadFull) as e:
+        await bulkhead.acquire()
+    assert e.value.reason == "timeout"
+    assert bulkhead.queued == 0
+    # The slot is still held by the first call only
+    bulkhead.release()
+    assert bulkhead.active == 0
+
+
+@pytest.mark.anyio
+async def test_bulkhead_cancelled_waiter_gives_up_its_place() -> None:
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=5, max_wait=1.0)
+    await bulkhead.acquire()
+    waiting = asyncio.ensure_future(bulkhead.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert bulkhead.queued == 0
+    bulkhead.release()
+    assert bulkhead.active == 0
@@ -0,0 +1,97 @@
+import gzip
+from collections.abc import Iterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+BODY = "0123456789" * 1000
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@app.get("/large")
+def large() -> PlainTextResponse:
+    return PlainTextResponse(BODY)
+
+
+@app.get("/small")
+def small() -> PlainTextResponse:
+    return PlainTextResponse("tiny")
+
+
+@app.get("/stream")
+def stream() -> StreamingResponse:
+    def chunks() -> Iterator[str]:
+        for _ in range(10):
+            yield BODY[:1000]
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@app.get("/encoded")
+def encoded() -> Response:
+    return Response(
+        gzip.compress(BODY.encode()),
+        media_type="text/plain",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+client = TestClient(app)
+
+
+def test_choose_encoding() -> None:
+    encodings = ["zstd", "br", "gzip"]
+    assert choose_encoding("gzip, deflate", encodings) == "gzip"
+    assert choose_encoding("gzip, br, zstd", encodings) == "zstd"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert choose_encoding("*", encodings) == "zstd"
+    assert choose_encoding("*, zstd;q=0", encodings) == "br"
+    assert choose_encoding("identity", encodings) is None
+    assert choose_encoding("", encodings) is None
+
+
+def test_gzip_response() -> None:
+    r = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert int(r.headers["content-length"]) < len(BODY)
+    assert r.text == BODY
+
+
+def test_small_response_not_compressed() -> None:
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.text == "tiny"
+
+
+def test_streaming_response_compressed() -> None:
+    r = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert r.text == BODY
+
+
+def test_already_encoded_response_passes_through() -> None:
+    r = client.get("/encoded", headers={"Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BODY
+
+
+def test_no_accepted_encoding() -> None:
+    r = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.text == BODY
+
+
+@pytest.mark.parametrize("encoding,module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings(encoding: str, module: str) -> None:
+    pytest.importorskip(module)
+    r = client.get("/large", headers={"Accept-Encoding": encoding}, extensions={})
+    assert r.headers["content-encoding"] == encoding
+    assert int(r.headers["content-length"]) < len(BODY)
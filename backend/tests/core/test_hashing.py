@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from app.core.hashing import HashingBusy, HashPool
+from app.core.security import _hash, _verify
+
+
+def test_hash_pool_runs_in_worker_process() -> None:
+    pool = HashPool(workers=1, max_pending=2, timeout=30)
+    try:
+        hashed = pool.run(_hash, "secret")
+        assert pool.run(_verify, "secret", hashed)
+        assert not pool.run(_verify, "other", hashed)
+    finally:
+        pool.shutdown()
+    assert pool.stats()["completed"] == 3
+    assert pool.pending == 0
+
+
+def test_hash_pool_sheds_when_saturated() -> None:
+    pool = HashPool(workers=1, max_pending=0, timeout=30)
+    with pytest.raises(HashingBusy):
+        pool.run(_hash, "secret")
+    assert pool.rejected == 1
+
+
+def test_hash_pool_bounds_pending_to_its_workers() -> None:
+    # Each pending call holds a request thread, so only a few may wait
+    pool = HashPool(workers=2, timeout=30)
+    assert pool.max_pending == 4
+    pool.pending = 4
+    with pytest.raises(HashingBusy):
+        pool.run(_hash, "secret")
+    assert pool._executor is None
+
+
+def test_hash_pool_without_workers_runs_inline() -> None:
+    pool = HashPool(workers=0, max_pending=0, timeout=30)
+    assert _verify("secret", pool.run(_hash, "secret"))
+    assert pool._executor is None
+
+
+def test_hash_pool_counts_timed_out_calls_until_done() -> None:
+    pool = HashPool(workers=1, max_pending=1, timeout=0.01)
+    try:
+        with pytest.raises(HashingBusy):
+            pool.run(time.sleep, 0.5)
+        # Still queued or running in the pool, so it keeps the only slot
+        assert pool.pending == 1
+        with pytest.raises(HashingBusy):
+            pool.run(time.sleep, 0)
+        assert pool.rejected == 1
+        deadline = time.monotonic() + 30
+        while pool.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,35 @@
+from app.core.hedging import HedgePolicy
+
+
+def test_hedge_delay_follows_percentile() -> None:
+    policy = HedgePolicy(percentile=90, min_delay=0.0, min_samples=10)
+    for i in range(9):
+        policy.observe(i / 100)
+    assert policy.delay() is None
+    for i in range(9, 100):
+        policy.observe(i / 100)
+    assert policy.delay() == 0.9
+
+
+def test_hedge_delay_has_a_floor() -> None:
+    policy = HedgePolicy(min_delay=0.05, min_samples=1)
+    policy.observe(0.001)
+    assert policy.delay() == 0.05
+
+
+def test_hedge_budget_limits_hedges() -> None:
+    policy = HedgePolicy(budget_ratio=0.1, budget_burst=2)
+    for _ in range(9):
+        policy.start_call()
+    assert not policy.allow_hedge()
+    policy.start_call()
+    assert policy.allow_hedge()
+    assert not policy.allow_hedge()
+    for _ in range(100):
+        policy.start_call()
+    # Unused budget only builds up to the burst size
+    assert policy.allow_hedge()
+    assert policy.allow_hedge()
+    assert not policy.allow_hedge()
+    assert policy.hedges == 3
+    assert policy.over_budget == 3
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+from sqlmodel import Session, col, create_engine, select
+
+from app.core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_rows,
+    split_page,
+)
+from app.models import User
+
+
+def test_cursor_round_trip() -> None:
+    key = uuid.uuid4()
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not a cursor", encode_cursor(uuid.uuid4())[:-2]]
+)
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_split_page() -> None:
+    keys = sorted(uuid.uuid4() for _ in range(3))
+
+    page, next_cursor = split_page(keys, 2, lambda key: key)
+    assert page == keys[:2]
+    assert next_cursor is not None
+    assert decode_cursor(next_cursor) == keys[1]
+
+    page, next_cursor = split_page(keys[:2], 2, lambda key: key)
+    assert page == keys[:2]
+    assert next_cursor is None
+
+
+def test_estimate_rows(db: Session) -> None:
+    for statement in (select(User), select(User).where(col(User.is_active))):
+        estimate = estimate_rows(db, statement)
+        assert isinstance(estimate, int)
+        assert estimate >= 0
+
+
+def test_estimate_rows_counts_off_postgres() -> None:
+    engine = create_engine("sqlite://")
+    User.metadata.create_all(engine, tables=[User.__table__])
+    with Session(engine) as session:
+        for i in range(2):
+            session.add(User(email=f"user{i}@example.com", hashed_password="x"))
+        session.commit()
+        assert estimate_rows(session, select(User)) == 2
+        statement = select(User).where(col(User.email) == "user0@example.com")
+        assert estimate_rows(session, statement) == 1
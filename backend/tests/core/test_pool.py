@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.pool import TimedQueuePool
+
+
+def test_records_checkouts(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    pool = engine.pool
+    assert isinstance(pool, TimedQueuePool)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+        snapshot = pool.snapshot()
+        assert snapshot["checked_out"] == 2
+        assert snapshot["overflow"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = pool.snapshot()
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 3
+    assert snapshot["timeouts"] == 1
+    # The timed out checkout waited for the pool timeout
+    assert snapshot["checkout_ms"]["max"] >= 50
+    assert snapshot["checkout_ms"]["p50"] is not None
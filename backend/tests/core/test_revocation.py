@@ -0,0 +1,50 @@
+import time
+
+from app.core.revocation import RevocationList
+
+
+def test_revoke_refuses_tokens_issued_before() -> None:
+    revocations = RevocationList(reload_interval=30, token_lifetime=900)
+    issued_before = time.time()
+    revocations.revoke("a")
+    assert revocations.is_revoked("a", issued_before)
+    assert not revocations.is_revoked("a", time.time() + 1)
+    assert not revocations.is_revoked("b", issued_before)
+    assert not revocations.is_inactive("a")
+
+
+def test_reload_replaces_inactive_users() -> None:
+    revocations = RevocationList(reload_interval=30, token_lifetime=900)
+    assert revocations.needs_reload()
+    revocations.reload(["a", "b"])
+    assert not revocations.needs_reload()
+    assert revocations.is_inactive("a")
+
+    revocations.revoke("a")
+    assert not revocations.is_inactive("a")
+    revocations.revoke("c", inactive=True)
+    assert revocations.is_inactive("c")
+
+    revocations.reload(["b"])
+    assert not revocations.is_inactive("c")
+    assert revocations.stats() == {"inactive": 1, "revoked": 2, "reloads": 2}
+
+
+def test_reload_forgets_revocations_older_than_tokens() -> None:
+    revocations = RevocationList(reload_interval=0, token_lifetime=0.05)
+    revocations.revoke("a")
+    issued_before = time.time() - 1
+    time.sleep(0.1)
+    revocations.reload([])
+    assert not revocations.is_revoked("a", issued_before)
+    assert revocations.needs_reload()
+
+
+def test_reload_adds_revocations_made_elsewhere() -> None:
+    revocations = RevocationList(reload_interval=30, token_lifetime=900)
+    issued_before = time.time() - 1
+    revocations.reload([], {"a": time.time(), "b": time.time() - 1000})
+    assert revocations.is_revoked("a", issued_before)
+    # Older than any token still valid
+    assert not revocations.is_revoked("b", time.time() - 2000)
+    assert revocations.stats()["revoked"] == 1
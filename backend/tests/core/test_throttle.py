@@ -0,0 +1,57 @@
+import time
+from pathlib import Path
+
+from app.core.throttle import LoginThrottle
+
+
+def make_throttle(tmp_path: Path, **kwargs: float) -> LoginThrottle:
+    options = {"window": 60.0, "lockout": 60.0} | kwargs
+    return LoginThrottle(
+        str(tmp_path / "throttle.db"),
+        window=options["window"],
+        lockout=options["lockout"],
+        limits={"email": 3, "ip": 5},
+    )
+
+
+def test_locks_out_at_limit(tmp_path: Path) -> None:
+    throttle = make_throttle(tmp_path)
+    keys = ["email:user@example.com", "ip:10.0.0.1"]
+    for _ in range(2):
+        throttle.record_failure(keys)
+        assert throttle.retry_after(keys) is None
+    throttle.record_failure(keys)
+    assert throttle.retry_after(keys) == 60
+    # Only the email is locked, the IP may try other accounts
+    assert throttle.retry_after(["ip:10.0.0.1"]) is None
+    assert throttle.retry_after(["email:USER@example.com"]) == 60
+    assert throttle.stats() == {"rejected": 2, "lockouts": 1}
+
+
+def test_failures_slide_out_of_window(tmp_path: Path) -> None:
+    throttle = make_throttle(tmp_path, window=0.05)
+    keys = ["email:user@example.com"]
+    throttle.record_failure(keys)
+    throttle.record_failure(keys)
+    time.sleep(0.1)
+    throttle.record_failure(keys)
+    assert throttle.retry_after(keys) is None
+
+
+def test_reset_forgets_failures(tmp_path: Path) -> None:
+    throttle = make_throttle(tmp_path)
+    keys = ["email:user@example.com"]
+    throttle.record_failure(keys)
+    throttle.record_failure(keys)
+    throttle.reset(keys[0])
+    throttle.record_failure(keys)
+    assert throttle.retry_after(keys) is None
+
+
+def test_shared_between_instances(tmp_path: Path) -> None:
+    # As the workers each open the same file
+    first, second = make_throttle(tmp_path), make_throttle(tmp_path)
+    keys = ["ip:10.0.0.1"]
+    for throttle in (first, second, first, second, first):
+        throttle.record_failure(keys)
+    assert second.retry_after(keys) == 60
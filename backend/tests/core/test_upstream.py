@@ -0,0 +1,26 @@
+import httpcore
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.upstream import Upstream
+
+
+def connection_pool(service: Upstream) -> httpcore.AsyncConnectionPool:
+    transport = service.client._transport
+    assert isinstance(transport, httpx.AsyncHTTPTransport)
+    return transport._pool
+
+
+def test_upstream_speaks_http1_by_default() -> None:
+    service = Upstream("items", "http://items.test/api/v1/items")
+    pool = connection_pool(service)
+    assert pool._http1 and not pool._http2
+
+
+def test_upstream_speaks_http2_when_enabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("h2")
+    monkeypatch.setattr(settings, "GATEWAY_HTTP2", True)
+    service = Upstream("items", "http://items.test/api/v1/items")
+    pool = connection_pool(service)
+    assert pool._http2 and not pool._http1
@@ -0,0 +1,23 @@
+from app.calibrate_hashing import Candidate, Timing, recommend
+
+
+def make_timing(scheme: str, work: int, p99: float) -> Timing:
+    candidate = Candidate(scheme=scheme, settings={}, work=work, hasher=None)
+    return Timing(candidate=candidate, p50=p99 / 2, p99=p99)
+
+
+def test_recommend_strongest_within_budget() -> None:
+    timings = [
+        make_timing("bcrypt", 2**10, 0.05),
+        make_timing("bcrypt", 2**11, 0.1),
+        make_timing("bcrypt", 2**12, 0.2),
+        make_timing("argon2", 3 * 64 * 1024, 0.12),
+        make_timing("argon2", 2 * 19 * 1024, 0.03),
+    ]
+    best = recommend(timings, budget=0.15)
+    assert best["bcrypt"].candidate.work == 2**11
+    assert best["argon2"].candidate.work == 3 * 64 * 1024
+
+
+def test_recommend_nothing_within_budget() -> None:
+    assert recommend([make_timing("bcrypt", 2**10, 0.2)], budget=0.1) == {}
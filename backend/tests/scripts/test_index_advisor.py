@@ -0,0 +1,76 @@
+from app.index_advisor import (
+    IndexStats,
+    StatementStats,
+    TableStats,
+    filtered_columns,
+    sequentially_scanned,
+    unindexed_filters,
+    unused_indexes,
+)
+
+
+def test_sequentially_scanned_large_tables_only() -> None:
+    tables = [
+        TableStats(
+            "item", seq_scan=500, seq_tup_read=10**6, idx_scan=10, live_rows=5000
+        ),
+        TableStats("user", seq_scan=500, seq_tup_read=500, idx_scan=10, live_rows=10),
+        TableStats(
+            "doctor", seq_scan=20, seq_tup_read=10**5, idx_scan=900, live_rows=5000
+        ),
+    ]
+    found = sequentially_scanned(tables, min_rows=1000, min_seq_scans=50)
+    assert [table.name for table in found] == ["item"]
+
+
+def test_unused_indexes_keep_constraints() -> None:
+    indexes = [
+        IndexStats(
+            "item", "item_pkey", idx_scan=0, size=8192, enforces_constraint=True
+        ),
+        IndexStats(
+            "item",
+            "ix_item_owner_id_id",
+            idx_scan=0,
+            size=16384,
+            enforces_constraint=False,
+        ),
+        IndexStats(
+            "doctor",
+            "ix_doctor_hospital_id_id",
+            idx_scan=3,
+            size=8192,
+            enforces_constraint=False,
+        ),
+    ]
+    assert [index.name for index in unused_indexes(indexes)] == ["ix_item_owner_id_id"]
+
+
+def test_filtered_columns_of_normalized_statement() -> None:
+    query = (
+        "SELECT item.id, item.title FROM item "
+        'WHERE item.owner_id = $1 AND "item".id > $2 ORDER BY item.id LIMIT $3'
+    )
+    assert filtered_columns(query) == {("item", "owner_id"), ("item", "id")}
+
+
+def test_unindexed_filters() -> None:
+    statements = [
+        StatementStats(
+            "SELECT * FROM doctortimeslot WHERE doctortimeslot.doctor_id = $1"
+            " AND doctortimeslot.is_available = $2",
+            calls=100,
+            total_ms=50.0,
+            mean_ms=0.5,
+        ),
+        StatementStats(
+            "SELECT * FROM item WHERE item.id = $1", calls=10, total_ms=1.0, mean_ms=0.1
+        ),
+    ]
+    leading_columns = {("item", "id"), ("doctortimeslot", "id")}
+    ((statement, missing),) = unindexed_filters(statements, leading_columns)
+    assert statement is statements[0]
+    assert missing == [
+        ("doctortimeslot", "doctor_id"),
+        ("doctortimeslot", "is_available"),
+    ]
@@ -151,8 +151,31 @@ export const AppointmentsPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
+        },
+        has_more: {
+            type: 'boolean',
+            title: 'Has More',
+            default: false
         }
     },
     type: 'object',
@@ -288,8 +311,31 @@ export const DoctorsPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
+        },
+        has_more: {
+            type: 'boolean',
+            title: 'Has More',
+            default: false
         }
     },
     type: 'object',
@@ -344,8 +390,31 @@ export const HospitalsPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
+        },
+        has_more: {
+            type: 'boolean',
+            title: 'Has More',
+            default: false
         }
     },
     type: 'object',
@@ -457,8 +526,31 @@ export const ItemsPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
+        },
+        has_more: {
+            type: 'boolean',
+            title: 'Has More',
+            default: false
         }
     },
     type: 'object',
@@ -531,6 +623,28 @@ export const TokenSchema = {
             type: 'string',
             title: 'Token Type',
             default: 'bearer'
+        },
+        refresh_token: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Refresh Token'
+        },
+        expires_in: {
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Expires In'
         }
     },
     type: 'object',
@@ -805,8 +919,31 @@ export const UsersPublicSchema = {
             title: 'Data'
         },
         count: {
-            type: 'integer',
+            anyOf: [
+                {
+                    type: 'integer'
+                },
+                {
+                    type: 'null'
+                }
+            ],
             title: 'Count'
+        },
+        next_cursor: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Next Cursor'
+        },
+        has_more: {
+            type: 'boolean',
+            title: 'Has More',
+            default: false
         }
     },
     type: 'object',
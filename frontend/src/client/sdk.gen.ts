@@ -29,10 +29,12 @@ export class AppointmentsService {
     
     /**
      * Get Hospitals
-     * Get list of all hospitals.
+     * Get list of all hospitals, in pages after skip hospitals or a cursor.
      * @param data The data for the request.
+     * @param data.cursor
      * @param data.skip
      * @param data.limit
+     * @param data.count
      * @returns HospitalsPublic Successful Response
      * @throws ApiError
      */
@@ -41,8 +43,10 @@ export class AppointmentsService {
             method: 'GET',
             url: '/api/v1/appointments/hospitals',
             query: {
+                cursor: data.cursor,
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -55,8 +59,10 @@ export class AppointmentsService {
      * Get list of doctors for a specific hospital.
      * @param data The data for the request.
      * @param data.hospitalId
+     * @param data.cursor
      * @param data.skip
      * @param data.limit
+     * @param data.count
      * @returns DoctorsPublic Successful Response
      * @throws ApiError
      */
@@ -68,8 +74,10 @@ export class AppointmentsService {
                 hospital_id: data.hospitalId
             },
             query: {
+                cursor: data.cursor,
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -122,8 +130,10 @@ export class AppointmentsService {
      * Get Appointments
      * Get list of appointments for the current user.
      * @param data The data for the request.
+     * @param data.cursor
      * @param data.skip
      * @param data.limit
+     * @param data.count
      * @returns AppointmentsPublic Successful Response
      * @throws ApiError
      */
@@ -132,8 +142,10 @@ export class AppointmentsService {
             method: 'GET',
             url: '/api/v1/appointments/',
             query: {
+                cursor: data.cursor,
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -211,10 +223,12 @@ export class AppointmentsService {
 export class ItemsService {
     /**
      * Read Items
-     * Retrieve items.
+     * Retrieve items, in pages either after skip items or after a cursor.
      * @param data The data for the request.
+     * @param data.cursor
      * @param data.skip
      * @param data.limit
+     * @param data.count
      * @returns ItemsPublic Successful Response
      * @throws ApiError
      */
@@ -223,8 +237,10 @@ export class ItemsService {
             method: 'GET',
             url: '/api/v1/items/',
             query: {
+                cursor: data.cursor,
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -441,10 +457,12 @@ export class PrivateService {
 export class UsersService {
     /**
      * Read Users
-     * Retrieve users.
+     * Retrieve users, in pages either after skip users or after a cursor.
      * @param data The data for the request.
+     * @param data.cursor
      * @param data.skip
      * @param data.limit
+     * @param data.count
      * @returns UsersPublic Successful Response
      * @throws ApiError
      */
@@ -453,8 +471,10 @@ export class UsersService {
             method: 'GET',
             url: '/api/v1/users/',
             query: {
+                cursor: data.cursor,
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -26,7 +26,9 @@ export type AppointmentPublic = {
 
 export type AppointmentsPublic = {
     data: Array<AppointmentPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
+    has_more?: boolean;
 };
 
 export type AppointmentUpdate = {
@@ -52,7 +54,9 @@ export type DoctorPublic = {
 
 export type DoctorsPublic = {
     data: Array<DoctorPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
+    has_more?: boolean;
 };
 
 export type DoctorTimeSlotPublic = {
@@ -70,7 +74,9 @@ export type HospitalPublic = {
 
 export type HospitalsPublic = {
     data: Array<HospitalPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
+    has_more?: boolean;
 };
 
 export type HTTPValidationError = {
@@ -91,7 +97,9 @@ export type ItemPublic = {
 
 export type ItemsPublic = {
     data: Array<ItemPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
+    has_more?: boolean;
 };
 
 export type ItemUpdate = {
@@ -118,6 +126,8 @@ export type PrivateUserCreate = {
 export type Token = {
     access_token: string;
     token_type?: string;
+    refresh_token?: (string | null);
+    expires_in?: (number | null);
 };
 
 export type UpdatePassword = {
@@ -149,7 +159,9 @@ export type UserRegister = {
 
 export type UsersPublic = {
     data: Array<UserPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
+    has_more?: boolean;
 };
 
 export type UserUpdate = {
@@ -185,6 +197,8 @@ export type AppointmentsValidateUserData = {
 export type AppointmentsValidateUserResponse = (Message);
 
 export type AppointmentsGetHospitalsData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -192,6 +206,8 @@ export type AppointmentsGetHospitalsData = {
 export type AppointmentsGetHospitalsResponse = (HospitalsPublic);
 
 export type AppointmentsGetHospitalDoctorsData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     hospitalId: string;
     limit?: number;
     skip?: number;
@@ -212,6 +228,8 @@ export type AppointmentsCreateAppointmentData = {
 export type AppointmentsCreateAppointmentResponse = (AppointmentPublic);
 
 export type AppointmentsGetAppointmentsData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -238,6 +256,8 @@ export type AppointmentsDeleteAppointmentData = {
 export type AppointmentsDeleteAppointmentResponse = (Message);
 
 export type ItemsReadItemsData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -302,6 +322,8 @@ export type PrivateCreateUserData = {
 export type PrivateCreateUserResponse = (UserPublic);
 
 export type UsersReadUsersData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -6,6 +6,8 @@ import {
   type Body_login_login_access_token as AccessToken,
   type ApiError,
   LoginService,
+  OpenAPI,
+  type Token,
   type UserPublic,
   type UserRegister,
   UsersService,
@@ -16,6 +18,78 @@ const isLoggedIn = () => {
   return localStorage.getItem("access_token") !== null
 }
 
+const storeTokens = (token: Token) => {
+  localStorage.setItem("access_token", token.access_token)
+  if (token.refresh_token) {
+    localStorage.setItem("refresh_token", token.refresh_token)
+  }
+  if (token.expires_in) {
+    const expiresAt = Date.now() + token.expires_in * 1000
+    localStorage.setItem("access_token_expires_at", String(expiresAt))
+  }
+}
+
+const clearTokens = () => {
+  localStorage.removeItem("access_token")
+  localStorage.removeItem("refresh_token")
+  localStorage.removeItem("access_token_expires_at")
+}
+
+let refreshing: Promise<string> | null = null
+
+const needsRefresh = () => {
+  const expiresAt = Number(localStorage.getItem("access_token_expires_at"))
+  return Date.now() >= expiresAt - 30_000
+}
+
+const refreshAccessToken = async (): Promise<string> => {
+  const token = localStorage.getItem("access_token") || ""
+  const refreshToken = localStorage.getItem("refresh_token")
+  // Another tab may have refreshed while this one waited for the lock, its
+  // refresh token has been rotated and this one's would count as reused
+  if (!token || !refreshToken || !needsRefresh()) {
+    return token
+  }
+  try {
+    const response = await fetch(
+      `${OpenAPI.BASE}/api/v1/login/refresh-token`,
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      },
+    )
+    if (!response.ok) {
+      return token
+    }
+    const refreshed: Token = await response.json()
+    storeTokens(refreshed)
+    return refreshed.access_token
+  } catch {
+    return token
+  }
+}
+
+// Access tokens are short lived, get a new one shortly before it expires.
+// Plain fetch, the generated client would ask for the token again. The tabs
+// share the tokens in localStorage, so one refreshes at a time across them
+const getAccessToken = async (): Promise<string> => {
+  const token = localStorage.getItem("access_token") || ""
+  if (!token || !localStorage.getItem("refresh_token") || !needsRefresh()) {
+    return token
+  }
+  if (!refreshing) {
+    refreshing = (
+      navigator.locks
+        ? navigator.locks.request("refresh_token", refreshAccessToken)
+        : refreshAccessToken()
+    ).finally(() => {
+      refreshing = null
+    })
+  }
+  return refreshing
+}
+
 const useAuth = () => {
   const [error, setError] = useState<string | null>(null)
   const navigate = useNavigate()
@@ -45,7 +119,7 @@ const useAuth = () => {
     const response = await LoginService.loginAccessToken({
       formData: data,
     })
-    localStorage.setItem("access_token", response.access_token)
+    storeTokens(response)
   }
 
   const loginMutation = useMutation({
@@ -59,7 +133,7 @@ const useAuth = () => {
   })
 
   const logout = () => {
-    localStorage.removeItem("access_token")
+    clearTokens()
     navigate({ to: "/login" })
   }
 
@@ -73,5 +147,5 @@ const useAuth = () => {
   }
 }
 
-export { isLoggedIn }
+export { clearTokens, getAccessToken, isLoggedIn }
 export default useAuth